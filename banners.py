@@ -0,0 +1,108 @@
+import hashlib
+import os
+import re
+from urllib.parse import parse_qs, urlsplit
+
+import discord
+
+BANNER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'banners')
+EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Attachment URLs are signed for about a day; they are refreshed this many
+# seconds before they expire
+REFRESH_MARGIN = 21600
+
+
+def banner_name(boss):
+    """File name, without extension, of a boss's banner: "Lady Dalia" -> "lady-dalia"."""
+    return re.sub(r'[^a-z0-9]+', '-', boss.lower()).strip('-')
+
+
+def url_expiry(url):
+    """When a signed Discord CDN URL expires (its hex ``ex`` parameter), or None if it does not say."""
+    ex = parse_qs(urlsplit(url).query).get('ex')
+    try:
+        return int(ex[0], 16) if ex else None
+    except ValueError:
+        return None
+
+
+class BannerCache:
+    """Banner images from ``assets/banners``, served by Discord attachment URL.
+
+    Each image is uploaded once, as an attachment in the asset channel, and
+    embeds link to the attachment's URL from then on. Uploads are recorded in
+    the store by the SHA-256 of the file, so a restart or an unchanged image
+    never uploads again, and editing an image uploads the new version. Discord
+    signs attachment URLs with an expiry; ``sync`` fetches a fresh URL a
+    ``margin`` before that, and is meant to run periodically.
+
+    ``upload(name, path)`` posts a file and returns ``(channel_id, message_id,
+    url)``; ``refresh(channel_id, message_id)`` returns the attachment's
+    current URL, or None if the message no longer has it. A banner without an
+    image file, or not uploaded yet, has no URL and the embed simply goes
+    without an image.
+    """
+
+    def __init__(self, store, upload, refresh, directory=BANNER_DIR, margin=REFRESH_MARGIN):
+        self.store = store
+        self.upload = upload
+        self.refresh = refresh
+        self.directory = directory
+        self.margin = margin
+        # Banner name -> (path, digest)
+        self.files = {}
+        # Digest -> (channel_id, message_id, url)
+        self.uploads = {}
+
+    def load(self):
+        """Hash the image files and restore earlier uploads; returns how many images were found."""
+        self.files = {}
+        if os.path.isdir(self.directory):
+            for filename in sorted(os.listdir(self.directory)):
+                name, ext = os.path.splitext(filename)
+                if ext.lower() not in EXTENSIONS or name in self.files:
+                    continue
+                path = os.path.join(self.directory, filename)
+                with open(path, 'rb') as f:
+                    self.files[name] = (path, hashlib.sha256(f.read()).hexdigest())
+        self.uploads = {digest: (channel_id, message_id, url)
+                        for digest, channel_id, message_id, url in self.store.load_banners()}
+        return len(self.files)
+
+    def url(self, name):
+        entry = self.files.get(name)
+        upload = self.uploads.get(entry[1]) if entry else None
+        return upload[2] if upload else None
+
+    async def sync(self, now):
+        """Upload new or changed images and refresh URLs expiring within the margin."""
+        for name, (path, digest) in self.files.items():
+            upload = self.uploads.get(digest)
+            expiry = url_expiry(upload[2]) if upload else None
+            if upload is not None and (expiry is None or expiry - now > self.margin):
+                continue
+            try:
+                if upload is not None:
+                    try:
+                        url = await self.refresh(upload[0], upload[1])
+                    except discord.NotFound:
+                        url = None
+                    # The asset message was deleted or edited; upload again
+                    upload = (upload[0], upload[1], url) if url else None
+                if upload is None:
+                    upload = await self.upload(name, path)
+                    print(f'Uploaded banner {name} ({digest[:12]})')
+            except Exception as e:
+                print(f'Could not upload or refresh banner {name}: {e}')
+                # A link that has expired shows a broken image; better none at all
+                if expiry is not None and expiry <= now:
+                    self.uploads.pop(digest, None)
+                continue
+            self.uploads[digest] = upload
+            self.store.save_banner(digest, *upload)
+        # Uploads of images since changed or removed
+        current = {digest for _, digest in self.files.values()}
+        for digest in [d for d in self.uploads if d not in current]:
+            del self.uploads[digest]
+            self.store.remove_banner(digest)
@@ -0,0 +1,137 @@
+"""Reminder fan-out and /l9 command benchmark against the fake Discord stand-in.
+
+Runs the real bot (``bot.create_bot``) offline: each scale connects N guilds
+through fakediscord's gateway replay, fires one reminder to every guild and
+replays a few /l9 commands. Run from the repository root:
+
+    python -m benchmarks.bench_dispatch --guilds 100 1000 10000
+
+Reports dispatch throughput, delivery skew (the time from the reminder being
+due to each send completing), interaction latency and the memory the bot's
+state takes per guild. ``--max-p99`` and ``--min-throughput`` turn it into a
+regression gate: the exit status is 1 if any scale misses them.
+
+Discord's real global limit is 50 requests/second; the default
+``--global-rate`` is far above it so the benchmark measures the bot rather
+than the pacing. Pass ``--global-rate 50`` to see production pacing.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import bot as app
+from dispatcher import FanoutDispatcher
+from fakediscord import FakeDiscord, guild_payload
+
+COMMANDS = [('upcoming', {'count': 5}), ('schedule', {}), ('samplealert', {}), ('help', {})]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scale(guilds, args, tmpdir):
+    # Keep the repository's legacy JSON files out of the benchmark
+    app.CONFIG_FILE = os.path.join(tmpdir, 'bot_config.json')
+    app.EVENTS_FILE = os.path.join(tmpdir, 'events_config.json')
+    guild_ids = list(range(1000, 1000 + guilds))
+    payloads = [guild_payload(guild_id) for guild_id in guild_ids]
+    fake = FakeDiscord(latency=args.latency, jitter=args.jitter, rate_limit_rate=args.rate_limit_rate,
+                       retry_after=args.retry_after, seed=guilds)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    dispatcher = FanoutDispatcher(workers=args.workers, global_rate=args.global_rate, history=guilds)
+    bot = app.create_bot(os.path.join(tmpdir, f'bench-{guilds}.db'), dispatcher_=dispatcher,
+                         guild_ready_timeout=0.01)
+    for guild_id in guild_ids:
+        app.update_guild_config(guild_id, reminder_channel_id=guild_id * 1000 + 1,
+                                mention_role_id=guild_id * 1000 + 1)
+    start = time.perf_counter()
+    await fake.connect(bot, payloads)
+    connect_s = time.perf_counter() - start
+    del payloads
+    state_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    # Every guild has the default daily 11:00 world boss
+    now = datetime.now(app.TIMEZONE)
+    event_time = now.replace(hour=11, minute=0, second=0, microsecond=0)
+    if event_time <= now:
+        event_time += timedelta(days=1)
+    recipients = list(app.reminder_jobs.recipients(event_time))
+    scheduled_at = datetime.now(app.TIMEZONE)
+    start = time.perf_counter()
+    await app.send_daily_summary_reminder(0, recipients, scheduled_at)
+    dispatch_s = time.perf_counter() - start
+    skews = list(dispatcher.recent_skews)
+
+    latencies = []
+    for i in range(args.interactions):
+        command, options = COMMANDS[i % len(COMMANDS)]
+        start = time.perf_counter()
+        await fake.invoke(bot, guild_ids[i % guilds], command, options)
+        latencies.append(time.perf_counter() - start)
+
+    app.scheduler.shutdown(wait=False)
+    app.store.close()
+    return {
+        'guilds': guilds,
+        'connect_s': connect_s,
+        'delivered': len(skews),
+        'throughput': len(skews) / dispatch_s if dispatch_s else 0.0,
+        'skew_p50': percentile(skews, 50),
+        'skew_p99': percentile(skews, 99),
+        'interaction_p50': percentile(latencies, 50),
+        'interaction_p99': percentile(latencies, 99),
+        'bytes_per_guild': state_bytes / guilds,
+        'rate_limited': fake.rate_limited,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated REST latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02, help='extra random latency in seconds')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='probability of a 429 per request')
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--global-rate', type=float, default=100000.0)
+    parser.add_argument('--interactions', type=int, default=40)
+    parser.add_argument('--max-p99', type=float, help='fail if delivery skew p99 exceeds this many seconds')
+    parser.add_argument('--min-throughput', type=float, help='fail if fewer sends per second than this')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'guilds':>7} {'connect':>8} {'sent':>6} {'sends/s':>8} {'skew p50':>9} {'skew p99':>9} "
+          f"{'cmd p50':>8} {'cmd p99':>8} {'KiB/guild':>9} {'429s':>5}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for guilds in args.guilds:
+            r = asyncio.run(run_scale(guilds, args, tmpdir))
+            print(f"{r['guilds']:>7} {r['connect_s']:>7.2f}s {r['delivered']:>6} {r['throughput']:>8.0f} "
+                  f"{r['skew_p50']:>8.2f}s {r['skew_p99']:>8.2f}s {r['interaction_p50'] * 1000:>6.1f}ms "
+                  f"{r['interaction_p99'] * 1000:>6.1f}ms {r['bytes_per_guild'] / 1024:>9.1f} {r['rate_limited']:>5}")
+            if r['delivered'] < guilds:
+                failures.append(f"{guilds} guilds: delivered {r['delivered']}/{guilds}")
+            if args.max_p99 is not None and r['skew_p99'] > args.max_p99:
+                failures.append(f"{guilds} guilds: skew p99 {r['skew_p99']:.2f}s > {args.max_p99}s")
+            if args.min_throughput is not None and r['throughput'] < args.min_throughput:
+                failures.append(f"{guilds} guilds: {r['throughput']:.0f} sends/s < {args.min_throughput}")
+    print(f'peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB')
+    for failure in failures:
+        print(f'REGRESSION: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Memory per guild under each gateway cache profile, against the fake Discord stand-in.
+
+Builds the real bot (``bot.create_bot``) with each profile in
+``bot.CACHE_PROFILES``, connects N guilds through fakediscord's gateway
+replay and measures the memory the bot holds afterwards. Run from the
+repository root:
+
+    python -m benchmarks.bench_memory --guilds 1000 5000
+
+Each GUILD_CREATE carries ``--channels`` channels, ``--roles`` roles and
+``--members`` members. Profiles whose intents subscribe to guild messages
+then receive ``--messages`` MESSAGE_CREATEs per guild, as Discord would
+send them. A ``--custom`` share of guilds has edited its schedule and is
+configured with an alert channel. The total is split into the bot's own
+state (store, schedules, jobs) and the gateway caches filled by connecting.
+``--max-bytes-per-guild`` turns the low-memory profile's figure into a
+regression gate: the exit status is 1 if it is exceeded.
+"""
+import argparse
+import asyncio
+import gc
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+import bot as app
+from fakediscord import FakeDiscord, guild_payload, message_payload, user_payload
+
+
+async def run_profile(profile, guilds, args, tmpdir):
+    # Keep the repository's legacy JSON files out of the benchmark
+    app.CONFIG_FILE = os.path.join(tmpdir, 'bot_config.json')
+    app.EVENTS_FILE = os.path.join(tmpdir, 'events_config.json')
+    guild_ids = list(range(1000, 1000 + guilds))
+    fake = FakeDiscord(latency=0)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    bot = app.create_bot(os.path.join(tmpdir, f'bench-{profile}-{guilds}.db'), profile=profile,
+                         guild_ready_timeout=0.01)
+    for guild_id in guild_ids[:int(guilds * args.custom)]:
+        app.update_guild_config(guild_id, reminder_channel_id=guild_id * 1000 + 1)
+        app.update_guild_event(guild_id, guild_id % len(app.events), hour=guild_id % 24)
+    app.store.flush()
+    app_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    # Built while tracing and dropped before measuring, so the strings the
+    # caches keep from them count and the rest does not
+    payloads = [guild_payload(guild_id, args.channels, args.roles, members=args.members) for guild_id in guild_ids]
+    await fake.connect(bot, payloads)
+    del payloads
+    if bot.intents.guild_messages:
+        for guild_id in guild_ids:
+            for n in range(args.messages):
+                message = message_payload(guild_id * 1000 + 1, {'content': f'message {n}'})
+                message['guild_id'] = str(guild_id)
+                message['author'] = user_payload(guild_id * 1000000 + 1, 'member-1')
+                fake.dispatch(bot, 'MESSAGE_CREATE', message)
+        # Let the on_message handlers the messages started finish
+        await asyncio.sleep(0.1)
+    gc.collect()
+    state_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    app.scheduler.shutdown(wait=False)
+    app.store.close()
+    return {
+        'profile': profile,
+        'guilds': guilds,
+        'bytes_per_guild': state_bytes / guilds,
+        'app_bytes_per_guild': app_bytes / guilds,
+        'cached_messages': len(bot.cached_messages),
+        'cached_members': sum(len(guild.members) for guild in bot.guilds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--guilds', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--profiles', nargs='+', default=list(app.CACHE_PROFILES), choices=list(app.CACHE_PROFILES))
+    parser.add_argument('--channels', type=int, default=20)
+    parser.add_argument('--roles', type=int, default=10)
+    parser.add_argument('--members', type=int, default=50)
+    parser.add_argument('--messages', type=int, default=10)
+    parser.add_argument('--custom', type=float, default=0.1, help='share of guilds with an edited schedule')
+    parser.add_argument('--max-bytes-per-guild', type=float, help='fail if the low-memory profile exceeds this')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'profile':>10} {'guilds':>7} {'KiB/guild':>9} {'bot state':>9} {'gateway':>8} {'messages':>9} {'members':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for guilds in args.guilds:
+            for profile in args.profiles:
+                r = asyncio.run(run_profile(profile, guilds, args, tmpdir))
+                print(f"{r['profile']:>10} {r['guilds']:>7} {r['bytes_per_guild'] / 1024:>9.1f} "
+                      f"{r['app_bytes_per_guild'] / 1024:>9.1f} "
+                      f"{(r['bytes_per_guild'] - r['app_bytes_per_guild']) / 1024:>8.1f} "
+                      f"{r['cached_messages']:>9} {r['cached_members']:>8}")
+                if (args.max_bytes_per_guild is not None and profile == 'low-memory'
+                        and r['bytes_per_guild'] > args.max_bytes_per_guild):
+                    failures.append(f"{guilds} guilds: {r['bytes_per_guild']:.0f} bytes/guild "
+                                    f"> {args.max_bytes_per_guild:.0f}")
+    print(f'peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB')
+    for failure in failures:
+        print(f'REGRESSION: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Channel/role picker lookups: index build time and per-keystroke search latency.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pickers --names 100 1000 5000
+"""
+import argparse
+import random
+import string
+import time
+
+from pickers import PrefixIndex
+
+WORDS = ['guild', 'boss', 'raid', 'alerts', 'general', 'officers', 'pvp', 'world', 'team', 'chat']
+
+
+def make_names(count, seed=1):
+    rng = random.Random(seed)
+    return [('-'.join(rng.sample(WORDS, 2)) + f'-{i}', i) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--names', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--queries', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    # What an admin types, one keystroke at a time
+    queries = [word[:rng.randint(1, len(word))] for word in rng.choices(WORDS + list(string.digits), k=args.queries)]
+    print(f"{'names':>7} {'build':>9} {'p50':>9} {'p99':>9}")
+    for count in args.names:
+        names = make_names(count)
+        t0 = time.perf_counter()
+        index = PrefixIndex(names)
+        build = time.perf_counter() - t0
+        timings = []
+        for query in queries:
+            t0 = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - t0)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99)]
+        print(f"{count:>7} {build * 1000:>7.2f}ms {p50 * 1e6:>7.1f}us {p99 * 1e6:>7.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Per-send render cost of the daily summary: legacy string building vs the
+compiled, render-once template.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_render --guilds 5000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import discord
+
+from occurrences import DAYS_MAP, Event
+from reminders import (
+    TIMEZONE, WORLD_BOSS_BANNERS, compile_summary_template, format_time_12h, get_time_remaining, quotes,
+    schedule_key,
+)
+
+EVENTS = [
+    Event("Guild Boss", "Saturday", 20, 0),
+    Event("Garbana Dungeon", "Saturday", 20, 0),
+    Event("World Boss: Ratan, Parto, Nedra", "Everyday", 11, 0),
+    Event("World Boss: Ratan, Parto, Nedra", "Everyday", 20, 0),
+]
+
+# Stands in for the attachment URL of the banner
+BANNER_URL = "https://cdn.discordapp.com/attachments/1/2/ratan-parto-nedra.png?ex=68d573bd&is=68d4223d&hm=0"
+
+
+# The legacy summary's next-occurrence lookup (today or the next matching weekday)
+def next_event_time(event, now):
+    event_weekday = DAYS_MAP.get(event.day, None)
+    event_time = now.replace(hour=event.hour, minute=event.minute, second=0, microsecond=0)
+    if event_weekday is not None:
+        # Calculate days until next event weekday
+        days_ahead = (event_weekday - now.weekday()) % 7
+        if days_ahead == 0 and event_time < now:
+            days_ahead = 7
+        event_time = event_time + timedelta(days=days_ahead)
+    else:
+        # 'Everyday' events
+        if event_time < now:
+            event_time += timedelta(days=1)
+    return event_time
+
+
+def legacy_render(events_data, when, now):
+    """The summary as send_daily_summary_reminder built it for every send."""
+    guild_boss = next((e for e in events_data if 'Guild Boss' in e.name), None)
+    guild_boss_str = "Guild Boss Schedule: Not set"
+    if guild_boss:
+        gb_time = next_event_time(guild_boss, now)
+        gb_remain = get_time_remaining(gb_time, now)
+        guild_boss_str = f"**Guild Boss Schedule**:\n{guild_boss.day} at {format_time_12h(guild_boss.hour, guild_boss.minute)} GMT+8 (Time Remaining: {gb_remain})"
+    garbana = next((e for e in events_data if 'Garbana' in e.name), None)
+    garbana_str = "Garbana Rally Schedule: Not set"
+    if garbana:
+        garbana_time = next_event_time(garbana, now)
+        garbana_remain = get_time_remaining(garbana_time, now)
+        garbana_str = f"**Garbana Rally Schedule**:\n{garbana.day} at {format_time_12h(garbana.hour, garbana.minute)} GMT+8 (Time Remaining: {garbana_remain})"
+    world_bosses = [e for e in events_data if 'World Boss' in e.name]
+    boss_names = set(WORLD_BOSS_BANNERS.keys())
+    boss_events_str = ""
+    for boss in boss_names:
+        boss_events = [e for e in world_bosses if boss in e.name]
+        for event in boss_events:
+            event_time = next_event_time(event, now)
+            time_remaining = get_time_remaining(event_time, now)
+            if when == '15 min before':
+                boss_events_str += f"- {event.name} : {event.day} at {format_time_12h(event.hour, event.minute)} GMT+8 (Prepare to move in 15 mins, Time Remaining: {time_remaining})\n"
+            else:
+                boss_events_str += f"- {event.name} : {event.day} at {format_time_12h(event.hour, event.minute)} GMT+8 (Time Remaining: {time_remaining})\n"
+    embed_desc = (
+        "📢 **DAILY GUILD & WORLD BOSS REMINDER** 📢\n\n"
+        f"{guild_boss_str}\n"
+        f"{garbana_str}\n"
+    )
+    embed_desc += "\n---------------------------------------------\n\n**World Boss Timer**\n"
+    embed_desc += boss_events_str if boss_events_str else "No world boss events configured.\n"
+    banner_url = BANNER_URL
+    embed = discord.Embed(
+        title=f"Daily Guild & World Boss Reminder ({when})",
+        description=embed_desc + "\n" + random.choice(quotes),
+        color=0x00ff99
+    )
+    embed.set_image(url=banner_url)
+    embed.add_field(name="Support the App", value="[Buy me a coffee](https://buymeacoffee.com/l9alerts)", inline=False)
+    return embed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--guilds', type=int, default=5000)
+    parser.add_argument('--schedules', type=int, default=10,
+                        help='number of distinct schedules shared by the guilds')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    schedules = [EVENTS] + [
+        [e.replace(hour=rng.randrange(24)) for e in EVENTS] for _ in range(args.schedules - 1)
+    ]
+    guild_schedules = [schedules[i % len(schedules)] for i in range(args.guilds)]
+    guild_keys = [schedule_key(events_data) for events_data in guild_schedules]
+    now = datetime.now(TIMEZONE).replace(second=0, microsecond=0)
+    when = '15 min before'
+
+    # Both paths must produce the same text
+    assert (legacy_render(EVENTS, when, now).description.rsplit("\n", 1)[0]
+            == compile_summary_template(guild_keys[0], when).render(now, BANNER_URL).description.rsplit("\n", 1)[0])
+
+    start = time.perf_counter()
+    for events_data in guild_schedules:
+        legacy_render(events_data, when, now)
+    legacy = time.perf_counter() - start
+
+    compile_summary_template.cache_clear()
+    start = time.perf_counter()
+    for key in guild_keys:
+        compile_summary_template(key, when).render(now, BANNER_URL)
+    cached = time.perf_counter() - start
+
+    print(f"{args.guilds} sends, {args.schedules} distinct schedules, one tick")
+    print(f"legacy render   {legacy / args.guilds * 1e6:8.2f}us/send  total {legacy * 1e3:8.2f}ms")
+    print(f"template render {cached / args.guilds * 1e6:8.2f}us/send  total {cached * 1e3:8.2f}ms "
+          f"({legacy / cached:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
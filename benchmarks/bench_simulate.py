@@ -0,0 +1,60 @@
+"""Simulated-schedule throughput: a year of reminders in virtual time.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_simulate --guilds 1 100 1000 --days 365
+
+Guilds draw their schedules from a pool of ``--schedules`` distinct ones, as
+real guilds mostly keep or lightly edit the default. An occurrence is one
+reminder to one guild; "rendered" includes building each reminder's embed.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_storage import DEFAULT_EVENTS
+from occurrences import Event
+from reminders import TIMEZONE
+from simulator import simulate
+
+
+def make_guild_events(guilds, schedules, seed=1):
+    rng = random.Random(seed)
+    default = [Event.from_dict(e) for e in DEFAULT_EVENTS]
+    pool = [default]
+    while len(pool) < schedules:
+        events = list(default)
+        idx = rng.randrange(len(events))
+        events[idx] = events[idx].replace(hour=rng.randrange(24), minute=rng.randrange(0, 60, 5))
+        pool.append(events)
+    return {guild_id: pool[guild_id % len(pool)] for guild_id in range(1, guilds + 1)}
+
+
+def run(guild_events, start, end, render):
+    occurrences = 0
+    t0 = time.perf_counter()
+    for firing in simulate(guild_events, start, end, render=render):
+        occurrences += len(firing.guild_ids)
+    return occurrences, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--guilds', type=int, nargs='+', default=[1, 100, 1000])
+    parser.add_argument('--schedules', type=int, default=20)
+    parser.add_argument('--days', type=float, default=365)
+    args = parser.parse_args()
+
+    start = TIMEZONE.localize(datetime(2026, 1, 1))
+    end = start + timedelta(days=args.days)
+    print(f"{'guilds':>7} {'occurrences':>12} {'schedule only':>16} {'rendered':>16}")
+    for guilds in args.guilds:
+        guild_events = make_guild_events(guilds, min(args.schedules, guilds))
+        occurrences, plain = run(guild_events, start, end, render=False)
+        _, rendered = run(guild_events, start, end, render=True)
+        print(f"{guilds:>7} {occurrences:>12} {occurrences / plain:>11.0f} occ/s {occurrences / rendered:>11.0f} occ/s")
+
+
+if __name__ == '__main__':
+    main()
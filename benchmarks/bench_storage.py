@@ -0,0 +1,104 @@
+"""Compare the legacy full-file JSON rewrite with the SQLite store.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storage --guilds 10000 --updates 500
+
+"Blocking" is the time the caller (the event loop, in the bot) spends per
+update; "durable" is the wall time until every update is on disk.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from occurrences import Event
+from storage import Store
+
+DEFAULT_EVENTS = [
+    {"name": "Guild Boss", "day": "Saturday", "hour": 20, "minute": 0},
+    {"name": "Garbana Dungeon", "day": "Saturday", "hour": 20, "minute": 0},
+    {"name": "World Boss: Ratan, Parto, Nedra", "day": "Everyday", "hour": 11, "minute": 0},
+    {"name": "World Boss: Ratan, Parto, Nedra", "day": "Everyday", "hour": 20, "minute": 0},
+]
+
+
+def make_state(guilds):
+    configs = {gid: {"reminder_channel_id": gid * 10, "mention_role_id": gid * 100} for gid in range(1, guilds + 1)}
+    events = {gid: [dict(e) for e in DEFAULT_EVENTS] for gid in range(1, guilds + 1)}
+    return configs, events
+
+
+def make_updates(guilds, updates, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randint(1, guilds), rng.randrange(len(DEFAULT_EVENTS)), rng.randrange(24), rng.randrange(60))
+            for _ in range(updates)]
+
+
+def bench_json(tmpdir, configs, events, updates):
+    config_file = os.path.join(tmpdir, 'bot_config.json')
+    events_file = os.path.join(tmpdir, 'events_config.json')
+    with open(config_file, 'w') as f:
+        json.dump({str(k): v for k, v in configs.items()}, f)
+    blocking = []
+    start = time.perf_counter()
+    for guild_id, idx, hour, minute in updates:
+        t0 = time.perf_counter()
+        events[guild_id][idx].update(hour=hour, minute=minute)
+        with open(events_file, 'w') as f:
+            json.dump({str(k): v for k, v in events.items()}, f)
+        blocking.append(time.perf_counter() - t0)
+    return blocking, time.perf_counter() - start
+
+
+def bench_sqlite(tmpdir, configs, events, updates):
+    events = {guild_id: [Event.from_dict(e) for e in events_data] for guild_id, events_data in events.items()}
+    store = Store(os.path.join(tmpdir, 'l9alerts.db'))
+    for guild_id, guild_config in configs.items():
+        store.save_config(guild_id, guild_config)
+    for guild_id, events_data in events.items():
+        store.save_events(guild_id, events_data)
+    store.flush()
+    blocking = []
+    start = time.perf_counter()
+    for guild_id, idx, hour, minute in updates:
+        t0 = time.perf_counter()
+        events[guild_id][idx] = events[guild_id][idx].replace(hour=hour, minute=minute)
+        store.save_event(guild_id, idx, events[guild_id][idx])
+        blocking.append(time.perf_counter() - t0)
+    store.flush()
+    durable = time.perf_counter() - start
+    store.close()
+    return blocking, durable
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, blocking, durable, updates):
+    print(f"{label:<18} blocking p50={percentile(blocking, 50) * 1e6:9.1f}us "
+          f"p99={percentile(blocking, 99) * 1e6:9.1f}us  "
+          f"durable total={durable * 1e3:8.1f}ms ({updates / durable:,.0f} updates/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--guilds', type=int, default=10000)
+    parser.add_argument('--updates', type=int, default=500)
+    args = parser.parse_args()
+
+    updates = make_updates(args.guilds, args.updates)
+    print(f"{args.guilds} guilds, {args.updates} event edits")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        configs, events = make_state(args.guilds)
+        report("json full rewrite", *bench_json(tmpdir, configs, events, updates), args.updates)
+        configs, events = make_state(args.guilds)
+        report("sqlite store", *bench_sqlite(tmpdir, configs, events, updates), args.updates)
+
+
+if __name__ == '__main__':
+    main()
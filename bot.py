@@ -1,168 +1,303 @@
+import time
+# Taken before the heavy imports so startup timing includes them
+PROCESS_STARTED = time.monotonic()
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
 import os
-import random
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timedelta
-import pytz
-import json
 from discord import app_commands, Interaction
 from discord.ui import View, Select, Button, Modal, TextInput
 from typing import Optional
+from banners import BANNER_DIR, BannerCache, banner_name
+from clock import SystemClock
+from countdown import EDIT_RATE, CountdownBoard, countdown_embed, render_countdown
+from storage import Store
+from subscriptions import SubscriptionIndex
+from dispatcher import Expired, FanoutDispatcher, GLOBAL_RATE
+from metrics import (
+    DELIVERY_LAG, INTERACTION_DURATION, SEND_FAILURES, Gauge, RateLimitLogCounter, monitor_event_loop, registry,
+    start_http_server,
+)
+from jobs import LEAD_TIMES, ReminderJobs, SQLiteJobStore
+from occurrences import Event, OccurrenceIndex
+from outbox import Outbox, message_nonce
+from pickers import MAX_CHOICES, PickerIndexes
+from respawns import RespawnTracker, from_tick, load_field_bosses, parse_kill_time, to_tick
+from reminders import (
+    SAMPLE, TIMEZONE, WORLD_BOSS_BANNERS, compile_summary_template, format_time_12h, get_time_remaining,
+    schedule_key,
+)
+
+def log_startup(phase, **fields):
+    # One JSON line per startup phase, timed from process start
+    print(json.dumps({"event": "startup", "phase": phase,
+                      "elapsed_s": round(time.monotonic() - PROCESS_STARTED, 3), **fields}))
 
 # Load your bot token from environment
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-if not TOKEN:
-    raise RuntimeError('DISCORD_BOT_TOKEN environment variable not set. Please set it before running the bot.')
-
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix='!', intents=intents)
-scheduler = AsyncIOScheduler()
 
 # Event schedule (GMT+8)
 events = [
-    {"name": "Guild Boss", "day": "Saturday", "hour": 20, "minute": 0},
-    {"name": "Garbana Dungeon", "day": "Saturday", "hour": 20, "minute": 0},
-    {"name": "World Boss: Ratan, Parto, Nedra", "day": "Everyday", "hour": 11, "minute": 0},
-    {"name": "World Boss: Ratan, Parto, Nedra", "day": "Everyday", "hour": 20, "minute": 0},
-]
-
-# Quotes about min-maxing
-quotes = [
-    "Min-maxing: because every stat point counts!",
-    "A true hero knows the value of optimization.",
-    "Why settle for average when you can be legendary?",
-    "In Lord Nine, min-maxing is the path to glory.",
-    "The difference between good and great is in the details.",
+    Event("Guild Boss", "Saturday", 20, 0),
+    Event("Garbana Dungeon", "Saturday", 20, 0),
+    Event("World Boss: Ratan, Parto, Nedra", "Everyday", 11, 0),
+    Event("World Boss: Ratan, Parto, Nedra", "Everyday", 20, 0),
 ]
 
 CONFIG_FILE = 'bot_config.json'
 EVENTS_FILE = 'events_config.json'
 
-WORLD_BOSS_BANNERS = {
-    "Ratan, Parto, Nedra": "https://cdn.discordapp.com/attachments/1262911795333566465/1420453316898459831/image.png?ex=68d573bd&is=68d4223d&hm=bda257b318454fffb305bff98c25e050d091d055e90c0cf714380519cf737597",
-}
-
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        return {"reminder_channel_id": 0, "mention_role_id": 0}
-    with open(CONFIG_FILE, 'r') as f:
-        return json.load(f)
-
-def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f)
-
-def load_events():
-    if os.path.exists(EVENTS_FILE):
-        with open(EVENTS_FILE, 'r') as f:
-            return json.load(f)
-    return events.copy()
-
-def save_events(events_data):
-    with open(EVENTS_FILE, 'w') as f:
-        json.dump(events_data, f)
-
-config = load_config()
-events_data = load_events()
-
-def get_time_remaining(event_time):
-    now = datetime.now(pytz.timezone('Asia/Singapore'))
-    delta = event_time - now
-    total_seconds = int(delta.total_seconds())
-    days = total_seconds // 86400
-    hours = (total_seconds % 86400) // 3600
-    minutes = (total_seconds % 3600) // 60
-    return f"{days}d {hours}h {minutes}m"
-
-def format_time_12h(hour, minute):
-    suffix = "AM" if hour < 12 or hour == 24 else "PM"
-    hour_12 = hour % 12
-    if hour_12 == 0:
-        hour_12 = 12
-    return f"{hour_12}:{minute:02d} {suffix}"
-
-async def send_reminder(event, when):
-    channel_id = config.get('reminder_channel_id', 0)
-    channel = bot.get_channel(channel_id) if channel_id else None
-    mention_role_id = config.get('mention_role_id')
-    mention_text = f'<@&{mention_role_id}>' if mention_role_id else ''
-    if isinstance(channel, discord.TextChannel):
-        now = datetime.now(pytz.timezone('Asia/Singapore'))
-        event_time = now.replace(hour=event['hour'], minute=event['minute'], second=0, microsecond=0)
-        if event_time < now:
-            event_time += timedelta(days=1)
-        time_remaining = get_time_remaining(event_time)
-        embed = discord.Embed(
-            title=f"{event['name']} Reminder ({when})",
-            description=f"Scheduled for {format_time_12h(event['hour'], event['minute'])} GMT+8\nTime Remaining: {time_remaining}",
-            color=0x00ff99
-        )
-        embed.set_footer(text=random.choice(quotes))
-        # Add banner for world bosses
-        for boss in WORLD_BOSS_BANNERS:
-            if boss in event['name']:
-                embed.set_image(url=WORLD_BOSS_BANNERS[boss])
-                break
-        await channel.send(content=mention_text if mention_text else None, embed=embed)
-
-async def send_daily_summary_reminder(when):
-    channel_id = config.get('reminder_channel_id', 0)
-    channel = bot.get_channel(channel_id) if channel_id else None
-    mention_role_id = config.get('mention_role_id')
+DB_FILE = os.getenv('L9_DB_PATH', 'l9alerts.db')
+
+DEFAULT_CONFIG = {"reminder_channel_id": 0, "mention_role_id": 0}
+
+# Guild the bot served before it became multi-guild; legacy single-guild
+# config/event files are migrated onto this id.
+LEGACY_GUILD_ID = 1072094900776087572
+
+MISFIRE_GRACE = int(os.getenv('L9_MISFIRE_GRACE', '600'))
+
+# Channel the banner images in assets/banners are uploaded to, once; without
+# one, embeds go without banners
+ASSET_CHANNEL_ID = int(os.getenv('L9_ASSET_CHANNEL_ID', '0'))
+
+# Optional overrides for the field boss respawn table (see respawns.py)
+FIELD_BOSSES_FILE = os.getenv('L9_FIELD_BOSSES', 'field_bosses.json')
+
+# Process-wide bot state, set up by create_bot()
+bot = None
+store = None
+job_store = None
+scheduler = None
+reminder_jobs = None
+dispatcher = None
+countdowns = None
+outbox = None
+subscriptions = None
+dm_dispatcher = None
+respawns = None
+banners = None
+# Everything that needs the current time asks this, so it can be swapped for a VirtualClock
+clock = None
+
+# Per-guild state, keyed by guild id
+guild_configs = {}
+guild_events = {}
+
+def get_guild_config(guild_id):
+    return guild_configs.get(guild_id, DEFAULT_CONFIG)
+
+def update_guild_config(guild_id, **changes):
+    guild_config = guild_configs.setdefault(guild_id, dict(DEFAULT_CONFIG))
+    guild_config.update(changes)
+    store.save_config(guild_id, guild_config)
+
+def get_alert_channel(guild_id):
+    # Looked up through the guild: bot.get_channel scans every guild the bot is in
+    channel_id = get_guild_config(guild_id).get('reminder_channel_id', 0)
+    guild = bot.get_guild(guild_id) if channel_id else None
+    return guild.get_channel(channel_id) if guild else None
+
+def get_guild_events(guild_id):
+    # Guilds that never edited their schedule share the default event list
+    return guild_events.get(guild_id, events)
+
+# Schedule keys of guilds with their own events; dropped on every edit so the
+# reminder template cache picks up the new schedule
+guild_schedule_keys = {}
+DEFAULT_SCHEDULE_KEY = schedule_key(events)
+
+def get_guild_schedule_key(guild_id):
+    if guild_id not in guild_events:
+        return DEFAULT_SCHEDULE_KEY
+    key = guild_schedule_keys.get(guild_id)
+    if key is None:
+        key = guild_schedule_keys[guild_id] = schedule_key(guild_events[guild_id])
+    return key
+
+# Upcoming-occurrence indexes, built on first use; guilds on the default
+# schedule share one
+guild_indexes = {}
+default_index = OccurrenceIndex(events)
+
+def get_guild_index(guild_id):
+    if guild_id not in guild_events:
+        return default_index
+    index = guild_indexes.get(guild_id)
+    if index is None:
+        index = guild_indexes[guild_id] = OccurrenceIndex(guild_events[guild_id])
+    return index
+
+# Channel/role name indexes behind the setalert pickers, kept fresh by the
+# gateway listeners registered in create_bot()
+picker_indexes = PickerIndexes()
+
+async def invalidate_channel_picker(channel, *_):
+    picker_indexes.invalidate_channels(channel.guild.id)
+
+async def invalidate_role_picker(role, *_):
+    picker_indexes.invalidate_roles(role.guild.id)
+
+async def forget_guild_pickers(guild):
+    picker_indexes.forget(guild.id)
+
+async def forget_guild_kills(guild):
+    # No alert channel to send to any more
+    for boss in respawns.forget_guild(guild.id):
+        store.remove_kill(guild.id, boss)
+
+def update_guild_event(guild_id, event_idx, **changes):
+    if guild_id not in guild_events:
+        # The entries left unedited stay shared with the default schedule
+        guild_events[guild_id] = list(events)
+        guild_events[guild_id][event_idx] = events[event_idx].replace(**changes)
+        store.save_events(guild_id, guild_events[guild_id])
+    else:
+        guild_events[guild_id][event_idx] = guild_events[guild_id][event_idx].replace(**changes)
+        store.save_event(guild_id, event_idx, guild_events[guild_id][event_idx])
+    guild_schedule_keys.pop(guild_id, None)
+    index = guild_indexes.get(guild_id)
+    if index is not None:
+        index.update(event_idx, guild_events[guild_id][event_idx])
+    return guild_events[guild_id][event_idx]
+
+first_alert_delivered = False
+
+async def fire_reminder_slot(hour, minute, lead):
+    # Work out which firing this is from the clock, so a late run still
+    # measures its skew against the time it was due
+    now = clock.now()
+    fire = (hour * 60 + minute - lead) % 1440
+    scheduled_at = now.replace(hour=fire // 60, minute=fire % 60, second=0, microsecond=0)
+    if scheduled_at > now:
+        scheduled_at -= timedelta(days=1)
+    guild_ids = reminder_jobs.recipients(scheduled_at + timedelta(minutes=lead))
+    await send_daily_summary_reminder(lead, list(guild_ids), scheduled_at)
+    # Channel posts go first; DMs then share what is left of the global rate limit
+    await send_subscriber_dms(lead, guild_ids, scheduled_at)
+
+async def send_daily_summary_reminder(lead, guild_ids, scheduled_at):
+    # Every guild with an event at this time and a configured alert channel gets the summary
+    when = LEAD_TIMES[lead]
+    event_time = scheduled_at + timedelta(minutes=lead)
+    entries = []
+    for guild_id in guild_ids:
+        # A live countdown already counts down to the event; only the Start ping is posted
+        if get_guild_config(guild_id).get('countdown_message_id') and lead:
+            continue
+        if outbox_route(guild_id) is None:
+            continue
+        # Recorded before sending, so a failed send is retried and a repeated run is skipped
+        entry = outbox.enqueue(guild_id, lead, event_time)
+        if entry is not None:
+            entries.append(entry)
+    # Delivery lag is observed per entry by reminder_delivered, retries included
+    result = await outbox.deliver(entries, scheduled_at)
+    if result.failed:
+        SEND_FAILURES.inc(result.failed, when=when)
+    print(f'{when} reminder: delivered {result.delivered}/{len(entries)}, failed {result.failed}, '
+          f'expired {result.expired} '
+          f'(429s: {result.rate_limited}, {len(outbox.pending)} pending retry), '
+          f'skew p50 {result.percentile(50):.2f}s p99 {result.percentile(99):.2f}s')
+    global first_alert_delivered
+    if result.delivered and not first_alert_delivered:
+        first_alert_delivered = True
+        log_startup('first_alert', when=when, delivered=result.delivered)
+
+def outbox_route(guild_id):
+    channel = get_alert_channel(guild_id)
+    return channel.id if isinstance(channel, discord.TextChannel) else None
+
+def reminder_delivered(entry, lag):
+    DELIVERY_LAG.observe(lag, when='Respawn' if entry.boss else LEAD_TIMES[entry.lead])
+
+async def send_outbox_entry(entry):
+    if entry.boss is not None:
+        await send_respawn_alert(entry)
+        return
+    # Retries render the same text as the first attempt: as of the scheduled time
+    scheduled_at = datetime.fromtimestamp(entry.event_at, TIMEZONE) - timedelta(minutes=entry.lead)
+    await send_guild_summary_reminder(entry.guild_id, LEAD_TIMES[entry.lead], scheduled_at, message_nonce(entry.key))
+
+async def send_guild_summary_reminder(guild_id, when, now, nonce=None):
+    guild_config = get_guild_config(guild_id)
+    channel = get_alert_channel(guild_id)
+    mention_role_id = guild_config.get('mention_role_id')
     mention_text = f'<@&{mention_role_id}>' if mention_role_id else ''
     if not isinstance(channel, discord.TextChannel):
         return
-    now = datetime.now(pytz.timezone('Asia/Singapore'))
-    # Guild Boss
-    guild_boss = next((e for e in events_data if 'Guild Boss' in e['name']), None)
-    guild_boss_str = "Guild Boss Schedule: Not set"
-    if guild_boss:
-        gb_time = next_event_time(guild_boss, now)
-        gb_remain = get_time_remaining(gb_time)
-        guild_boss_str = f"**Guild Boss Schedule**:\n{guild_boss['day']} at {format_time_12h(guild_boss['hour'], guild_boss['minute'])} GMT+8 (Time Remaining: {gb_remain})"
-    # Garbana Rally
-    garbana = next((e for e in events_data if 'Garbana' in e['name']), None)
-    garbana_str = "Garbana Rally Schedule: Not set"
-    if garbana:
-        garbana_time = next_event_time(garbana, now)
-        garbana_remain = get_time_remaining(garbana_time)
-        garbana_str = f"**Garbana Rally Schedule**:\n{garbana['day']} at {format_time_12h(garbana['hour'], garbana['minute'])} GMT+8 (Time Remaining: {garbana_remain})"
-    # World Boss
-    world_bosses = [e for e in events_data if 'World Boss' in e['name']]
-    boss_names = set(WORLD_BOSS_BANNERS.keys())
-    boss_events_str = ""
-    for boss in boss_names:
-        boss_events = [e for e in world_bosses if boss in e['name']]
-        for event in boss_events:
-            event_time = next_event_time(event, now)
-            time_remaining = get_time_remaining(event_time)
-            # Custom wording for 15 min before
-            if when == '15 min before':
-                boss_events_str += f"- {event['name']} : {event['day']} at {format_time_12h(event['hour'], event['minute'])} GMT+8 (Prepare to move in 15 mins, Time Remaining: {time_remaining})\n"
-            else:
-                boss_events_str += f"- {event['name']} : {event['day']} at {format_time_12h(event['hour'], event['minute'])} GMT+8 (Time Remaining: {time_remaining})\n"
-    embed_desc = (
-        "📢 **DAILY GUILD & WORLD BOSS REMINDER** 📢\n\n"
-        f"{guild_boss_str}\n"
-        f"{garbana_str}\n"
-    )
-    embed_desc += "\n---------------------------------------------\n\n**World Boss Timer**\n"
-    embed_desc += boss_events_str if boss_events_str else "No world boss events configured.\n"
-    banner_url = next(iter(WORLD_BOSS_BANNERS.values()))
-    embed = discord.Embed(
-        title=f"Daily Guild & World Boss Reminder ({when})",
-        description=embed_desc + "\n" + random.choice(quotes),
-        color=0x00ff99
-    )
-    embed.set_image(url=banner_url)
-    embed.add_field(name="Support the App", value="[Buy me a coffee](https://buymeacoffee.com/l9alerts)", inline=False)
-    await channel.send(content=mention_text if mention_text else None, embed=embed)
+    # Rendered once per tick and shared by every guild on the same schedule
+    template = compile_summary_template(get_guild_schedule_key(guild_id), when)
+    embed = template.render(now, banners.url(template.banner))
+    await channel.send(content=mention_text if mention_text else None, embed=embed, nonce=nonce)
+
+def dm_timing(lead):
+    return f"{lead} minutes before it starts" if lead else "when it starts"
+
+async def send_subscriber_dms(lead, guild_ids, scheduled_at):
+    event_time = scheduled_at + timedelta(minutes=lead)
+    # DMs that could only arrive after the event started are skipped
+    deadline = event_time + timedelta(seconds=MISFIRE_GRACE) if not lead else event_time
+    texts = []
+    for guild_id in guild_ids:
+        index = get_guild_index(guild_id)
+        for name in {index.events[idx].name for idx in index.starting_at(event_time)}:
+            user_ids = subscriptions.recipients(guild_id, name, lead)
+            if not user_ids:
+                continue
+            guild = bot.get_guild(guild_id)
+            starts = f"starts in {lead} minutes" if lead else "is starting now"
+            # One text per (guild, event), shared by all its subscribers
+            text = (f"⏰ **{name}** {starts} ({format_time_12h(event_time.hour, event_time.minute)} GMT+8) "
+                    f"in {guild.name if guild else 'your server'}.\n"
+                    f"-# Stop these DMs with /l9 unsubscribe in that server.")
+            texts.append((guild_id, user_ids, text))
+    if not texts:
+        return
+    # Opening a DM channel is a request of its own; users without a cached
+    # channel get one first, paced like any other send
+    unresolved = {user_id for _, user_ids, _ in texts for user_id in user_ids
+                  if user_id not in subscriptions.dm_channels}
+    if unresolved:
+        result = await dm_dispatcher.dispatch(
+            [(user_id, functools.partial(open_dm_channel, user_id)) for user_id in unresolved],
+            scheduled_at, deadline)
+        print(f'{LEAD_TIMES[lead]} DM channels: opened {result.delivered}/{len(unresolved)}, '
+              f'failed {result.failed}, expired {result.expired}')
+    sends = [(channel_id, functools.partial(send_dm, guild_id, user_id, channel_id, text))
+             for guild_id, user_ids, text in texts for user_id in user_ids
+             if (channel_id := subscriptions.dm_channels.get(user_id)) is not None]
+    result = await dm_dispatcher.dispatch(sends, scheduled_at, deadline)
+    if result.failed:
+        SEND_FAILURES.inc(result.failed, when='DM')
+    print(f'{LEAD_TIMES[lead]} DMs: delivered {result.delivered}/{len(sends)}, failed {result.failed}, '
+          f'expired {result.expired}, skew p50 {result.percentile(50):.2f}s p99 {result.percentile(99):.2f}s')
+
+async def open_dm_channel(user_id):
+    channel = await bot.create_dm(discord.Object(id=user_id))
+    subscriptions.dm_channels[user_id] = channel.id
+    store.save_dm_channel(user_id, channel.id)
+
+async def send_dm(guild_id, user_id, channel_id, text):
+    try:
+        await bot.get_partial_messageable(channel_id, type=discord.ChannelType.private).send(text)
+    except discord.Forbidden:
+        # DMs closed, or no server shared with the bot any more; stop trying
+        for event, lead in subscriptions.remove_user(guild_id, user_id):
+            store.remove_subscription(guild_id, user_id, event, lead)
+        raise
 
 class EditEventTimeModal(Modal):
-    def __init__(self, event_idx, event_name, current_hour, current_minute, current_day=None):
+    def __init__(self, guild_id, event_idx, event_name, current_hour, current_minute, current_day=None):
         super().__init__(title=f"Edit Time: {event_name}")
+        self.guild_id = guild_id
         self.event_idx = event_idx
         self.hour_input = TextInput(label="Hour (0-23)", default=str(current_hour), required=True, max_length=2)
         self.minute_input = TextInput(label="Minute (0-59)", default=str(current_minute), required=True, max_length=2)
@@ -173,6 +308,7 @@ class EditEventTimeModal(Modal):
             self.day_input = TextInput(label="Day (e.g. Saturday)", default=str(current_day), required=True, max_length=10)
             self.add_item(self.day_input)
 
+    @INTERACTION_DURATION.time(callback='EditEventTimeModal')
     async def on_submit(self, interaction: Interaction):
         try:
             hour = int(self.hour_input.value)
@@ -182,8 +318,7 @@ class EditEventTimeModal(Modal):
         except ValueError:
             await interaction.response.send_message("Invalid time. Please enter valid hour (0-23) and minute (0-59).", ephemeral=True)
             return
-        events_data[self.event_idx]['hour'] = hour
-        events_data[self.event_idx]['minute'] = minute
+        changes = {'hour': hour, 'minute': minute}
         # Save new day if allowed
         if hasattr(self, 'day_input'):
             new_day = self.day_input.value.strip()
@@ -191,80 +326,87 @@ class EditEventTimeModal(Modal):
             if new_day not in valid_days:
                 await interaction.response.send_message(f"Invalid day. Please enter one of: {', '.join(valid_days)}.", ephemeral=True)
                 return
-            events_data[self.event_idx]['day'] = new_day
-        save_events(events_data)
-        await interaction.response.send_message(f"Updated {events_data[self.event_idx]['name']} to {hour:02d}:{minute:02d} {events_data[self.event_idx]['day']}.", ephemeral=True)
-        schedule_events()
+            changes['day'] = new_day
+        guild_id = interaction.guild_id or self.guild_id
+        event = update_guild_event(guild_id, self.event_idx, **changes)
+        await interaction.response.send_message(f"Updated {event.name} to {hour:02d}:{minute:02d} {event.day}.", ephemeral=True)
+        # Only the jobs for the times this edit touched change
+        reminder_jobs.update_guild(guild_id, get_guild_events(guild_id))
 
 class EventSelect(Select):
-    def __init__(self):
+    def __init__(self, guild_id):
         options = [
-            discord.SelectOption(label=f"{e['name']} ({e['day']})", value=str(idx))
-            for idx, e in enumerate(events_data)
+            discord.SelectOption(label=f"{e.name} ({e.day})", value=str(idx))
+            for idx, e in enumerate(get_guild_events(guild_id))
         ]
         super().__init__(placeholder="Select event to edit time...", min_values=1, max_values=1, options=options)
 
+    @INTERACTION_DURATION.time(callback='EventSelect')
     async def callback(self, interaction: Interaction):
         idx = int(self.values[0])
-        event = events_data[idx]
-        modal = EditEventTimeModal(idx, event['name'], event['hour'], event['minute'], event['day'])
+        event = get_guild_events(interaction.guild_id)[idx]
+        modal = EditEventTimeModal(interaction.guild_id, idx, event.name, event.hour, event.minute, event.day)
         await interaction.response.send_modal(modal)
 
 class ChannelSelect(Select):
     def __init__(self, guild):
+        index = picker_indexes.channel_index(guild)
         options = [
-            discord.SelectOption(label=channel.name, value=str(channel.id))
-            for channel in guild.text_channels
+            discord.SelectOption(label=name, value=str(channel_id))
+            for name, channel_id in index.search('', MAX_CHOICES)
         ]
         if not options:
             options = [discord.SelectOption(label="No channels found", value="none")]  # fallback
-        super().__init__(placeholder="Select alert channel...", min_values=1, max_values=1, options=options)
+        # Selects hold at most 25 options; larger servers search with /l9 setalert channel:
+        placeholder = "Select alert channel..." if len(index) <= MAX_CHOICES else "Select alert channel (or type /l9 setalert channel: to search)..."
+        super().__init__(placeholder=placeholder, min_values=1, max_values=1, options=options)
 
+    @INTERACTION_DURATION.time(callback='ChannelSelect')
     async def callback(self, interaction: Interaction):
         if self.values[0] == "none":
             await interaction.response.send_message("No channels available to select.", ephemeral=True)
             return
-        config['reminder_channel_id'] = int(self.values[0])
-        save_config(config)
+        update_guild_config(interaction.guild_id, reminder_channel_id=int(self.values[0]))
+        reminder_jobs.update_guild(interaction.guild_id, get_guild_events(interaction.guild_id))
         await interaction.response.send_message(f"Alert channel set to <#{self.values[0]}>.", ephemeral=True)
 
 class RoleSelect(Select):
     def __init__(self, guild):
-        roles = [role for role in guild.roles if not role.is_default()]
+        index = picker_indexes.role_index(guild)
         # Limit to 24 roles for Discord's 25-option limit (1 is 'No Role Mention')
-        roles = roles[:24]
         options = [
-            discord.SelectOption(label=role.name, value=str(role.id))
-            for role in roles
+            discord.SelectOption(label=name, value=str(role_id))
+            for name, role_id in index.search('', MAX_CHOICES - 1)
         ]
         options.insert(0, discord.SelectOption(label="No Role Mention", value="none"))
         if len(options) == 1:  # Only 'No Role Mention' present
             options.append(discord.SelectOption(label="No roles found", value="noroles"))
-        super().__init__(placeholder="Select role to mention...", min_values=1, max_values=1, options=options)
+        placeholder = "Select role to mention..." if len(index) < MAX_CHOICES else "Select role to mention (or type /l9 setalert role: to search)..."
+        super().__init__(placeholder=placeholder, min_values=1, max_values=1, options=options)
 
+    @INTERACTION_DURATION.time(callback='RoleSelect')
     async def callback(self, interaction: Interaction):
         if self.values[0] == "none":
-            config['mention_role_id'] = 0
-            save_config(config)
+            update_guild_config(interaction.guild_id, mention_role_id=0)
             await interaction.response.send_message("Role mention removed.", ephemeral=True)
         elif self.values[0] == "noroles":
             await interaction.response.send_message("No roles available to select.", ephemeral=True)
         else:
-            config['mention_role_id'] = int(self.values[0])
-            save_config(config)
+            update_guild_config(interaction.guild_id, mention_role_id=int(self.values[0]))
             await interaction.response.send_message(f"Role to mention set to <@&{self.values[0]}>.", ephemeral=True)
 
 class EditEventTimeButton(Button):
     def __init__(self):
         super().__init__(label="Edit Event Times", style=discord.ButtonStyle.primary)
 
+    @INTERACTION_DURATION.time(callback='EditEventTimeButton')
     async def callback(self, interaction: Interaction):
-        await interaction.response.send_message("Select an event to edit:", view=EventTimeView(), ephemeral=True)
+        await interaction.response.send_message("Select an event to edit:", view=EventTimeView(interaction.guild_id), ephemeral=True)
 
 class EventTimeView(View):
-    def __init__(self):
+    def __init__(self, guild_id):
         super().__init__(timeout=60)
-        self.add_item(EventSelect())
+        self.add_item(EventSelect(guild_id))
 
 class SettingsView(View):
     def __init__(self, guild):
@@ -274,162 +416,473 @@ class SettingsView(View):
         self.add_item(RoleSelect(guild))
         self.add_item(EditEventTimeButton())
 
-GUILD_ID = 1072094900776087572  # <-- Replace with your Discord server's ID
-
-guild_obj = discord.Object(id=GUILD_ID)
-
-l9_group = app_commands.Group(name="l9", description="Lord Nine bot commands", guild_ids=[GUILD_ID])
-bot.tree.add_command(l9_group)
+# Registered globally so one bot process serves every guild it is invited to
+l9_group = app_commands.Group(name="l9", description="Lord Nine bot commands", guild_only=True)
 
 @l9_group.command(name="setalert", description="Configure alert channel and mention role (admin only)")
+@app_commands.describe(channel="Alert channel; start typing to search", role="Role to mention; start typing to search")
 @app_commands.checks.has_permissions(administrator=True)
-async def setalert_command(interaction: Interaction):
-    # Show dropdowns for channel and role selection instead of modal
-    await interaction.response.send_message(
-        "Select the alert channel and role to mention:",
-        view=SettingsView(interaction.guild or interaction.client.get_guild(GUILD_ID)),
-        ephemeral=True
-    )
-
-@bot.event
-async def on_ready():
-    print(f'Logged in as {bot.user}')
+@INTERACTION_DURATION.time(callback='setalert')
+async def setalert_command(interaction: Interaction, channel: Optional[str] = None, role: Optional[str] = None):
+    if channel is None and role is None:
+        # Show dropdowns for channel and role selection instead of modal
+        await interaction.response.send_message(
+            "Select the alert channel and role to mention:",
+            view=SettingsView(interaction.guild),
+            ephemeral=True
+        )
+        return
+    changes = {}
+    replies = []
+    if channel is not None:
+        channel_id = resolve_pick(picker_indexes.channel_index(interaction.guild), channel)
+        target = interaction.guild.get_channel(channel_id) if channel_id else None
+        if not isinstance(target, discord.TextChannel):
+            await interaction.response.send_message("Pick a text channel from the suggestions.", ephemeral=True)
+            return
+        changes['reminder_channel_id'] = target.id
+        replies.append(f"Alert channel set to {target.mention}.")
+    if role == "none":
+        changes['mention_role_id'] = 0
+        replies.append("Role mention removed.")
+    elif role is not None:
+        role_id = resolve_pick(picker_indexes.role_index(interaction.guild), role)
+        target = interaction.guild.get_role(role_id) if role_id else None
+        if target is None or target.is_default():
+            await interaction.response.send_message("Pick a role from the suggestions.", ephemeral=True)
+            return
+        changes['mention_role_id'] = target.id
+        replies.append(f"Role to mention set to {target.mention}.")
+    update_guild_config(interaction.guild_id, **changes)
+    if 'reminder_channel_id' in changes:
+        reminder_jobs.update_guild(interaction.guild_id, get_guild_events(interaction.guild_id))
+    await interaction.response.send_message("\n".join(replies), ephemeral=True)
+
+def resolve_pick(index, value):
+    # Suggestions carry the id; typed text counts only if it names exactly one entry
+    if value.isdigit():
+        return int(value)
+    matches = index.search(value, 2)
+    return matches[0][1] if len(matches) == 1 else None
+
+@setalert_command.autocomplete('channel')
+@INTERACTION_DURATION.time(callback='setalert_channel_autocomplete')
+async def setalert_channel_autocomplete(interaction: Interaction, current: str):
+    return [
+        app_commands.Choice(name=f"#{name}", value=str(channel_id))
+        for name, channel_id in picker_indexes.channel_index(interaction.guild).search(current)
+    ]
+
+@setalert_command.autocomplete('role')
+@INTERACTION_DURATION.time(callback='setalert_role_autocomplete')
+async def setalert_role_autocomplete(interaction: Interaction, current: str):
+    choices = [
+        app_commands.Choice(name=f"@{name}", value=str(role_id))
+        for name, role_id in picker_indexes.role_index(interaction.guild).search(current, MAX_CHOICES - 1)
+    ]
+    if not current:
+        choices.insert(0, app_commands.Choice(name="No Role Mention", value="none"))
+    return choices
+
+async def setup_hook():
+    # Runs once per process, after login and before the gateway connects
+    log_startup('login')
+    await start_telemetry()
+    await clear_legacy_guild_commands()
+    tree_hash = command_tree_hash()
+    if tree_hash == store.get_meta('command_tree_hash') and not os.getenv('L9_FORCE_SYNC'):
+        print('Slash commands unchanged since last sync; skipping sync')
+        return
     try:
-        # Only sync commands for the guild (removes clear_commands to avoid Discord cache issues)
-        synced = await bot.tree.sync(guild=guild_obj)
-        print(f'Synced {len(synced)} slash commands for guild {GUILD_ID}. Commands: {[cmd.name for cmd in synced]}')
+        # Global sync; the commands become available in every guild the bot is in
+        synced = await bot.tree.sync()
+        store.set_meta('command_tree_hash', tree_hash)
+        print(f'Synced {len(synced)} global slash commands. Commands: {[cmd.name for cmd in synced]}')
     except Exception as e:
         print(f'Error syncing commands: {e}')
+
+async def clear_legacy_guild_commands():
+    # /l9 used to be registered in the legacy guild only; now that it is global
+    # that guild would show a stale second copy until its commands are cleared
+    if store.get_meta('legacy_guild_commands_cleared'):
+        return
+    guild = discord.Object(id=LEGACY_GUILD_ID)
+    try:
+        bot.tree.clear_commands(guild=guild)
+        await bot.tree.sync(guild=guild)
+        store.set_meta('legacy_guild_commands_cleared', 1)
+        print(f'Cleared legacy /l9 commands from guild {LEGACY_GUILD_ID}')
+    except discord.Forbidden:
+        # The bot has left that guild; there is nothing to clear
+        store.set_meta('legacy_guild_commands_cleared', 1)
+    except Exception as e:
+        print(f'Error clearing legacy guild commands: {e}')
+
+async def on_ready():
+    # READY fires again after every gateway reconnect; only the first one
+    # bootstraps the scheduler
+    global scheduler_armed
+    if scheduler_armed:
+        print(f'Reconnected as {bot.user}')
+        return
+    scheduler_armed = True
+    print(f'Logged in as {bot.user}')
+    log_startup('ready', guilds=len(bot.guilds))
     scheduler.start()
     schedule_events()
+    asyncio.create_task(outbox.run())
+    asyncio.create_task(run_countdowns())
+    asyncio.create_task(run_respawns())
+    if banners.files and ASSET_CHANNEL_ID:
+        asyncio.create_task(run_banners())
+    log_startup('scheduler_armed', jobs=len(scheduler.get_jobs()))
+
+scheduler_armed = False
+rate_limit_counter = RateLimitLogCounter(logging.WARNING)
+
+async def start_telemetry():
+    logging.getLogger('discord.http').addHandler(rate_limit_counter)
+    asyncio.create_task(monitor_event_loop())
+    # Heroku routes the web dyno's traffic to $PORT
+    port = os.getenv('PORT')
+    if port:
+        await start_http_server(int(port), lambda: bot.is_ready() and scheduler.running)
+        print(f'Serving /metrics, /healthz and /readyz on port {port}')
+
+registry.register(Gauge('l9_gateway_latency_seconds', 'Discord gateway heartbeat latency.', lambda: bot.latency))
+registry.register(Gauge('l9_scheduled_jobs', 'Jobs in the reminder job store.', lambda: job_store.count_jobs()))
+registry.register(Gauge('l9_outbox_pending', 'Reminders waiting for delivery or a retry.', lambda: len(outbox.pending)))
+registry.register(Gauge('l9_dm_subscriptions', 'Event DM subscriptions across guilds.', lambda: len(subscriptions)))
+registry.register(Gauge('l9_tracked_kills', 'Field boss kills waiting to respawn.', lambda: len(respawns)))
+registry.register(Gauge('l9_configured_guilds', 'Guilds with stored alert settings.', lambda: len(guild_configs)))
+
+async def run_countdowns():
+    # Wake on each minute boundary; the board decides which messages need an edit
+    while True:
+        now = clock.now()
+        await asyncio.sleep(60 - now.second - now.microsecond / 1e6)
+        try:
+            await update_countdowns()
+        except Exception as e:
+            print(f'Error updating countdowns: {e}')
+
+async def update_countdowns():
+    now = clock.now().replace(second=0, microsecond=0)
+    countdowns.refresh(
+        ((guild_id, guild_config['countdown_channel_id'], guild_config['countdown_message_id'], get_guild_schedule_key(guild_id))
+         for guild_id, guild_config in guild_configs.items() if guild_config.get('countdown_message_id')),
+        now,
+    )
+    if countdowns.pending:
+        result = await countdowns.flush(edit_countdown_message, now)
+        print(f'Countdowns: edited {result.delivered}, failed {result.failed}, {len(countdowns.pending)} deferred')
 
-# Helper to get next event time (today or next correct weekday)
-def next_event_time(event, now):
-    days_map = {
-        "Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3,
-        "Friday": 4, "Saturday": 5, "Sunday": 6, "Everyday": None
-    }
-    event_weekday = days_map.get(event['day'], None)
-    event_time = now.replace(hour=event['hour'], minute=event['minute'], second=0, microsecond=0)
-    if event_weekday is not None:
-        # Calculate days until next event weekday
-        days_ahead = (event_weekday - now.weekday()) % 7
-        if days_ahead == 0 and event_time < now:
-            days_ahead = 7
-        event_time = event_time + timedelta(days=days_ahead)
-    else:
-        # 'Everyday' events
-        if event_time < now:
-            event_time += timedelta(days=1)
-    return event_time
+async def edit_countdown_message(guild_id, channel_id, message_id, text):
+    message = bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+    try:
+        await message.edit(embed=countdown_embed(text))
+    except discord.NotFound:
+        # Deleted from the channel; stop updating it
+        update_guild_config(guild_id, countdown_channel_id=0, countdown_message_id=0)
+        countdowns.forget(guild_id)
+        raise
+
+async def run_respawns():
+    # The timer wheel ticks once a minute, on the minute
+    while True:
+        now = clock.now()
+        await asyncio.sleep(60 - now.second - now.microsecond / 1e6)
+        try:
+            await fire_respawn_alerts()
+        except Exception as e:
+            print(f'Error sending respawn alerts: {e}')
+
+async def fire_respawn_alerts():
+    tick = to_tick(clock.now())
+    alerts, expired = respawns.advance(tick)
+    for guild_id, boss in expired:
+        store.remove_kill(guild_id, boss)
+    entries = []
+    for guild_id, boss, lead, killed_at in alerts:
+        if outbox_route(guild_id) is None:
+            continue
+        # Through the outbox like schedule reminders: retried until the window
+        # opens (plus the grace for the "respawning now" alert), and sent once
+        # however often the tracker is rebuilt after a restart
+        opens, _ = respawns.window(boss, killed_at)
+        entry = outbox.enqueue(guild_id, lead, from_tick(opens, TIMEZONE), boss=boss)
+        if entry is not None:
+            entries.append(entry)
+    if not entries:
+        return
+    result = await outbox.deliver(entries, from_tick(tick, TIMEZONE))
+    if result.failed:
+        SEND_FAILURES.inc(result.failed, when='Respawn')
+    print(f'Respawn alerts: delivered {result.delivered}/{len(entries)}, failed {result.failed}, '
+          f'expired {result.expired}')
+
+def format_respawn(boss, killed_at):
+    opens, closes = respawns.window(boss, killed_at)
+    opens_at, closes_at = from_tick(opens, TIMEZONE), from_tick(closes, TIMEZONE)
+    text = f"{opens_at:%a} {format_time_12h(opens_at.hour, opens_at.minute)}"
+    if closes > opens:
+        text = f"between {text} and {format_time_12h(closes_at.hour, closes_at.minute)}"
+    return f"{text} GMT+8"
+
+async def send_respawn_alert(entry):
+    guild_id, boss = entry.guild_id, entry.boss
+    killed_at = respawns.kills.get(guild_id, {}).get(boss)
+    # The kill was replaced by a later one, or dropped, since this alert was queued
+    if killed_at is None or from_tick(respawns.window(boss, killed_at)[0], TIMEZONE).timestamp() != entry.event_at:
+        raise Expired(entry.key)
+    channel = get_alert_channel(guild_id)
+    if not isinstance(channel, discord.TextChannel):
+        return
+    mention_role_id = get_guild_config(guild_id).get('mention_role_id')
+    # A late alert says how long is actually left
+    remaining = round((entry.event_at - clock.now().timestamp()) / 60)
+    spawns = f"respawns in {remaining} minutes" if entry.lead and remaining > 0 else "is respawning now"
+    banner_url = banners.url(banner_name(boss))
+    await channel.send(f"{f'<@&{mention_role_id}> ' if mention_role_id else ''}⚔️ **{boss}** {spawns} "
+                       f"({format_respawn(boss, killed_at)}).",
+                       embed=discord.Embed(color=0x00ff99).set_image(url=banner_url) if banner_url else None,
+                       nonce=message_nonce(entry.key))
+
+async def run_banners():
+    # Uploads new images right away, then keeps the attachment URLs from expiring
+    while True:
+        try:
+            await banners.sync(clock.now().timestamp())
+        except Exception as e:
+            print(f'Error syncing banners: {e}')
+        await asyncio.sleep(3600)
+
+def check_banners():
+    # Nothing fails without banners, so a deployment missing them would not notice
+    missing = sorted(set(WORLD_BOSS_BANNERS.values()) - set(banners.files))
+    if missing:
+        print(f"WARNING: no banner image for {', '.join(missing)} in {BANNER_DIR}; "
+              f"those reminders are sent without a banner")
+    if banners.files and not ASSET_CHANNEL_ID:
+        print(f'WARNING: {len(banners.files)} banner images found but L9_ASSET_CHANNEL_ID is not set; '
+              f'reminders are sent without banners until it is')
+
+async def upload_banner(name, path):
+    message = await bot.get_partial_messageable(ASSET_CHANNEL_ID).send(
+        file=discord.File(path, filename=f"{name}{os.path.splitext(path)[1]}"))
+    return message.channel.id, message.id, message.attachments[0].url
+
+async def refresh_banner(channel_id, message_id):
+    # Fetching the message signs its attachment URLs afresh
+    message = await bot.get_partial_messageable(channel_id).fetch_message(message_id)
+    return message.attachments[0].url if message.attachments else None
+
+def command_tree_hash():
+    payload = [command.to_dict(bot.tree) for command in sorted(bot.tree.get_commands(), key=lambda c: c.name)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
 
 def schedule_events():
-    scheduler.remove_all_jobs()
-    # Schedule daily summary reminders at 11AM and 8PM GMT+8
-    for hour in [11, 20]:
-        # 15 min before
-        before_hour = hour
-        before_minute = 0 - 15
-        if before_minute < 0:
-            before_minute += 60
-            before_hour -= 1
-            if before_hour < 0:
-                before_hour = 23
-        scheduler.add_job(
-            send_daily_summary_reminder,
-            CronTrigger(hour=before_hour, minute=before_minute, timezone='Asia/Singapore'),
-            args=['15 min before']
-        )
-        # At event time
-        scheduler.add_job(
-            send_daily_summary_reminder,
-            CronTrigger(hour=hour, minute=0, timezone='Asia/Singapore'),
-            args=['Start']
-        )
+    # Register every configured or subscribed-to guild's schedule; later edits update jobs incrementally
+    for guild_id in set(guild_configs) | subscriptions.guilds():
+        reminder_jobs.update_guild(guild_id, get_guild_events(guild_id))
+    reminder_jobs.prune()
 
 @l9_group.command(name="schedule", description="Show the current event schedule and edit times")
+@INTERACTION_DURATION.time(callback='schedule')
 async def schedule_command(interaction: Interaction):
     lines = []
-    for event in events_data:
-        lines.append(f"**{event['name']}**: {event['day']} at {format_time_12h(event['hour'], event['minute'])} GMT+8")
+    for event in get_guild_events(interaction.guild_id):
+        lines.append(f"**{event.name}**: {event.day} at {format_time_12h(event.hour, event.minute)} GMT+8")
     schedule_text = "\n".join(lines)
-    view = EventTimeView()
+    view = EventTimeView(interaction.guild_id)
     await interaction.response.send_message(f"**Event Schedule:**\n{schedule_text}\n\n*Click the button below to edit event times.*", view=view, ephemeral=True)
 
 @l9_group.command(name="samplealert", description="Send a sample alert to the configured channel for preview/testing")
+@INTERACTION_DURATION.time(callback='samplealert')
 async def samplealert_command(interaction: Interaction):
-    channel_id = config.get('reminder_channel_id', 0)
-    channel = bot.get_channel(channel_id) if channel_id else None
-    mention_role_id = config.get('mention_role_id')
+    guild_config = get_guild_config(interaction.guild_id)
+    channel = get_alert_channel(interaction.guild_id)
+    mention_role_id = guild_config.get('mention_role_id')
     mention_text = f'<@&{mention_role_id}>' if mention_role_id else ''
     if not isinstance(channel, discord.TextChannel):
         await interaction.response.send_message("Configured channel is invalid. Please set a valid text channel.", ephemeral=True)
         return
-    now = datetime.now(pytz.timezone('Asia/Singapore'))
-    # Guild Boss
-    guild_boss = next((e for e in events_data if 'Guild Boss' in e['name']), None)
-    guild_boss_str = "Guild Boss Schedule: Not set"
-    if guild_boss:
-        gb_time = next_event_time(guild_boss, now)
-        gb_remain = get_time_remaining(gb_time)
-        guild_boss_str = f"**Guild Boss Schedule**:\n{guild_boss['day']} at {format_time_12h(guild_boss['hour'], guild_boss['minute'])} GMT+8 (Time Remaining: {gb_remain})"
-    # Garbana Rally
-    garbana = next((e for e in events_data if 'Garbana' in e['name']), None)
-    garbana_str = "Garbana Rally Schedule: Not set"
-    if garbana:
-        garbana_time = next_event_time(garbana, now)
-        garbana_remain = get_time_remaining(garbana_time)
-        garbana_str = f"**Garbana Rally Schedule**:\n{garbana['day']} at {format_time_12h(garbana['hour'], garbana['minute'])} GMT+8 (Time Remaining: {garbana_remain})"
-    # World Boss
-    world_bosses = [e for e in events_data if 'World Boss' in e['name']]
-    next_boss_events = []
-    boss_names = set(WORLD_BOSS_BANNERS.keys())
-    for boss in boss_names:
-        boss_events = [e for e in world_bosses if boss in e['name']]
-        soonest = None
-        soonest_time = None
-        for event in boss_events:
-            event_time = next_event_time(event, now)
-            delta = (event_time - now).total_seconds()
-            if 0 <= delta <= 900:
-                if soonest is None or (soonest_time is not None and event_time < soonest_time):
-                    soonest = event
-                    soonest_time = event_time
-        if soonest:
-            time_remaining = get_time_remaining(soonest_time)
-            next_boss_events.append((soonest, soonest_time, time_remaining))
-    embed_desc = (
-        "📢 **ATTENTION**📢\n\n"
-        f"{guild_boss_str}\n"
-        f"{garbana_str}\n"
+    now = clock.now()
+    template = compile_summary_template(get_guild_schedule_key(interaction.guild_id), SAMPLE)
+    embed = template.render(now, banners.url(template.banner))
+    await channel.send(content=mention_text if mention_text else None, embed=embed)
+    await interaction.response.send_message(f"Sample daily reminder sent to {channel.mention}.", ephemeral=True)
+
+@l9_group.command(name="upcoming", description="Show the next events on this server's schedule")
+@app_commands.describe(count="How many events to show (1-25)")
+@INTERACTION_DURATION.time(callback='upcoming')
+async def upcoming_command(interaction: Interaction, count: app_commands.Range[int, 1, 25] = 5):
+    now = clock.now()
+    index = get_guild_index(interaction.guild_id)
+    lines = []
+    for event_time, idx in index.upcoming(now, count):
+        event = index.events[idx]
+        lines.append(f"**{event.name}**: {event_time.strftime('%A')} at {format_time_12h(event.hour, event.minute)} GMT+8 (Time Remaining: {get_time_remaining(event_time, now)})")
+    upcoming_text = "\n".join(lines) if lines else "No events scheduled."
+    await interaction.response.send_message(f"**Upcoming Events:**\n{upcoming_text}", ephemeral=True)
+
+@l9_group.command(name="countdown", description="Keep one live timer message in the alert channel instead of posting each reminder (admin only)")
+@app_commands.describe(enabled="Turn the live countdown on or off")
+@app_commands.checks.has_permissions(administrator=True)
+@INTERACTION_DURATION.time(callback='countdown')
+async def countdown_command(interaction: Interaction, enabled: bool):
+    if not enabled:
+        update_guild_config(interaction.guild_id, countdown_channel_id=0, countdown_message_id=0)
+        countdowns.forget(interaction.guild_id)
+        await interaction.response.send_message("Live countdown turned off; reminders are posted as new messages again.", ephemeral=True)
+        return
+    channel = get_alert_channel(interaction.guild_id)
+    if not isinstance(channel, discord.TextChannel):
+        await interaction.response.send_message("Set an alert channel with /l9 setalert first.", ephemeral=True)
+        return
+    text = render_countdown(get_guild_schedule_key(interaction.guild_id), clock.now().replace(second=0, microsecond=0))
+    guild_config = get_guild_config(interaction.guild_id)
+    old_channel_id, old_message_id = guild_config.get('countdown_channel_id'), guild_config.get('countdown_message_id')
+    if old_message_id and old_channel_id == channel.id:
+        # Already running here: bring the existing message up to date rather than posting a second timer
+        try:
+            await edit_countdown_message(interaction.guild_id, channel.id, old_message_id, text)
+        except discord.NotFound:
+            pass
+        else:
+            countdowns.mark_shown(interaction.guild_id, text)
+            await interaction.response.send_message(f"Live countdown is already running in {channel.mention}.", ephemeral=True)
+            return
+    elif old_message_id:
+        # The alert channel moved; take down the timer left in the old one
+        try:
+            await bot.get_partial_messageable(old_channel_id).get_partial_message(old_message_id).delete()
+        except discord.HTTPException:
+            pass
+    message = await channel.send(embed=countdown_embed(text))
+    note = ""
+    try:
+        await message.pin()
+    except discord.HTTPException:
+        note = " I could not pin it; pin it yourself or give me Manage Messages."
+    update_guild_config(interaction.guild_id, countdown_channel_id=channel.id, countdown_message_id=message.id)
+    countdowns.mark_shown(interaction.guild_id, text)
+    await interaction.response.send_message(f"Live countdown posted in {channel.mention}.{note}", ephemeral=True)
+
+LEAD_CHOICES = [app_commands.Choice(name=label, value=lead) for lead, label in LEAD_TIMES.items()]
+
+def event_names(guild_id):
+    return list(dict.fromkeys(event.name for event in get_guild_events(guild_id)))
+
+@l9_group.command(name="subscribe", description="Get a DM before an event on this server's schedule")
+@app_commands.describe(event="Event to be reminded of", lead="When to get the DM (default: 15 min before)")
+@app_commands.choices(lead=LEAD_CHOICES)
+@INTERACTION_DURATION.time(callback='subscribe')
+async def subscribe_command(interaction: Interaction, event: str, lead: Optional[app_commands.Choice[int]] = None):
+    lead_minutes = lead.value if lead else 15
+    if event not in event_names(interaction.guild_id):
+        await interaction.response.send_message(f"There is no event called **{event}** on this server's schedule.", ephemeral=True)
+        return
+    if not subscriptions.add(interaction.guild_id, interaction.user.id, event, lead_minutes):
+        await interaction.response.send_message(f"You already get a DM for **{event}** {dm_timing(lead_minutes)}.", ephemeral=True)
+        return
+    store.add_subscription(interaction.guild_id, interaction.user.id, event, lead_minutes)
+    if interaction.guild_id not in reminder_jobs.guild_slots:
+        reminder_jobs.update_guild(interaction.guild_id, get_guild_events(interaction.guild_id))
+    await interaction.response.send_message(
+        f"You'll get a DM for **{event}** {dm_timing(lead_minutes)}. Make sure DMs from server members are allowed.",
+        ephemeral=True
     )
-    embed_desc += "\n---------------------------------------------\n\n**World Boss Timer**\n"
-    if next_boss_events:
-        for event, event_time, time_remaining in next_boss_events:
-            embed_desc += f"- {event['name']} : {event['day']} at {format_time_12h(event['hour'], event['minute'])} GMT+8 (Time Remaining: {time_remaining})\n"
+
+@l9_group.command(name="unsubscribe", description="Stop DMs for an event")
+@app_commands.describe(event="Event to stop DMs for", lead="Which DM to stop (default: both)")
+@app_commands.choices(lead=LEAD_CHOICES)
+@INTERACTION_DURATION.time(callback='unsubscribe')
+async def unsubscribe_command(interaction: Interaction, event: str, lead: Optional[app_commands.Choice[int]] = None):
+    leads = [lead.value] if lead else list(LEAD_TIMES)
+    removed = [m for m in leads if subscriptions.remove(interaction.guild_id, interaction.user.id, event, m)]
+    for lead_minutes in removed:
+        store.remove_subscription(interaction.guild_id, interaction.user.id, event, lead_minutes)
+    if removed:
+        await interaction.response.send_message(f"Stopped DMs for **{event}**.", ephemeral=True)
     else:
-        embed_desc += "No world boss event is within the next 15 minutes.\n"
-    banner_url = next(iter(WORLD_BOSS_BANNERS.values()))
-    embed = discord.Embed(
-        title="Daily Guild & World Boss Reminder (Sample)",
-        description=embed_desc + "\n" + random.choice(quotes),
-        color=0x00ff99
+        await interaction.response.send_message(f"You were not subscribed to **{event}**.", ephemeral=True)
+
+@subscribe_command.autocomplete('event')
+@INTERACTION_DURATION.time(callback='subscribe_event_autocomplete')
+async def subscribe_event_autocomplete(interaction: Interaction, current: str):
+    current = current.casefold()
+    return [app_commands.Choice(name=name, value=name)
+            for name in event_names(interaction.guild_id) if current in name.casefold()][:MAX_CHOICES]
+
+@unsubscribe_command.autocomplete('event')
+@INTERACTION_DURATION.time(callback='unsubscribe_event_autocomplete')
+async def unsubscribe_event_autocomplete(interaction: Interaction, current: str):
+    current = current.casefold()
+    names = sorted({event for event, _ in subscriptions.for_user(interaction.guild_id, interaction.user.id)})
+    return [app_commands.Choice(name=name, value=name) for name in names if current in name.casefold()][:MAX_CHOICES]
+
+@l9_group.command(name="killed", description="Log a field boss kill to get alerts before it respawns")
+@app_commands.describe(boss="Field boss that was killed", time="When it died, GMT+8, e.g. 14:05 or 2:05 PM (default: now)")
+@INTERACTION_DURATION.time(callback='killed')
+async def killed_command(interaction: Interaction, boss: str, time: Optional[str] = None):
+    if boss not in respawns.bosses:
+        await interaction.response.send_message(f"**{boss}** is not a field boss I know the respawn time of.", ephemeral=True)
+        return
+    now = clock.now()
+    try:
+        killed_at = parse_kill_time(time, now) if time else now
+    except ValueError:
+        await interaction.response.send_message(f"Could not read **{time}** as a time; use e.g. 14:05 or 2:05 PM.", ephemeral=True)
+        return
+    tick = to_tick(killed_at)
+    if not respawns.record(interaction.guild_id, boss, tick):
+        await interaction.response.send_message(f"**{boss}** would already have respawned ({format_respawn(boss, tick)}).", ephemeral=True)
+        return
+    store.save_kill(interaction.guild_id, boss, tick)
+    channel = get_alert_channel(interaction.guild_id)
+    where = (f"Alerts go to {channel.mention} {respawns.leads[0]} minutes before and at respawn."
+             if isinstance(channel, discord.TextChannel) else "Set an alert channel with /l9 setalert to get alerts.")
+    await interaction.response.send_message(
+        f"Logged **{boss}** killed at {format_time_12h(killed_at.hour, killed_at.minute)} GMT+8; "
+        f"it respawns {format_respawn(boss, tick)}. {where}"
     )
-    embed.set_image(url=banner_url)
-    embed.add_field(name="Support the App", value="[Buy me a coffee](https://buymeacoffee.com/l9alerts)", inline=False)
-    await channel.send(content=mention_text if mention_text else None, embed=embed)
-    await interaction.response.send_message(f"Sample daily reminder sent to {channel.mention}.", ephemeral=True)
+
+@killed_command.autocomplete('boss')
+@INTERACTION_DURATION.time(callback='killed_boss_autocomplete')
+async def killed_boss_autocomplete(interaction: Interaction, current: str):
+    current = current.casefold()
+    return [app_commands.Choice(name=name, value=name)
+            for name in sorted(respawns.bosses) if current in name.casefold()][:MAX_CHOICES]
+
+@l9_group.command(name="respawns", description="Show field bosses logged with /l9 killed and when they respawn")
+@INTERACTION_DURATION.time(callback='respawns')
+async def respawns_command(interaction: Interaction):
+    now = to_tick(clock.now())
+    lines = []
+    for opens, closes, boss, killed_at in respawns.upcoming(interaction.guild_id):
+        status = f"in {get_time_remaining(from_tick(opens, TIMEZONE), from_tick(now, TIMEZONE))}" if opens > now else "up"
+        lines.append(f"**{boss}**: {format_respawn(boss, killed_at)} ({status})")
+    respawn_text = "\n".join(lines) if lines else "No kills logged. Use /l9 killed when a field boss dies."
+    await interaction.response.send_message(f"**Field Boss Respawns:**\n{respawn_text}", ephemeral=True)
 
 @l9_group.command(name="help", description="Show all available commands and their functions")
+@INTERACTION_DURATION.time(callback='help')
 async def help_command(interaction: Interaction):
     help_text = (
         "**Lord Nine Bot Commands:**\n\n"
-        "/l9 setalert — Configure alert channel and mention role (admin only)\n"
+        "/l9 setalert [channel] [role] — Configure alert channel and mention role; type to search (admin only)\n"
         "/l9 schedule — Show the current event schedule and edit times\n"
         "/l9 samplealert — Send a sample alert to the configured channel for preview/testing\n"
+        "/l9 upcoming — Show the next events on this server's schedule\n"
+        "/l9 countdown — Keep one live timer message in the alert channel instead of posting each reminder (admin only)\n"
+        "/l9 subscribe <event> [lead] — Get a DM before an event\n"
+        "/l9 unsubscribe <event> [lead] — Stop DMs for an event\n"
+        "/l9 killed <boss> [time] — Log a field boss kill to get alerts before it respawns\n"
+        "/l9 respawns — Show logged field bosses and when they respawn\n"
         "/l9 help — Show all available commands and their functions\n\n"
         "**Scheduled Reminders:**\n"
-        "- Daily Guild & World Boss reminders are sent automatically at 11AM and 8PM GMT+8, and 15 minutes before.\n"
+        "- Daily Guild & World Boss reminders are sent automatically at each event's scheduled time, and 15 minutes before.\n"
         "- Each reminder includes a random MMORPG min-maxing quote.\n\n"
         "Support the App: [Buy me a coffee](https://buymeacoffee.com/l9alerts)"
     )
@@ -438,17 +891,22 @@ async def help_command(interaction: Interaction):
 # Remove invalid fallback command for /l9
 # Add error handler to show help if /l9 is used without a subcommand
 
-@bot.tree.error
 async def on_app_command_error(interaction: Interaction, error):
     if isinstance(error, app_commands.CommandNotFound):
         help_text = (
             "**Lord Nine Bot Commands:**\n\n"
-            "/l9 setalert — Configure alert channel and mention role (admin only)\n"
+            "/l9 setalert [channel] [role] — Configure alert channel and mention role; type to search (admin only)\n"
             "/l9 schedule — Show the current event schedule and edit times\n"
             "/l9 samplealert — Send a sample alert to the configured channel for preview/testing\n"
+            "/l9 upcoming — Show the next events on this server's schedule\n"
+            "/l9 countdown — Keep one live timer message in the alert channel instead of posting each reminder (admin only)\n"
+            "/l9 subscribe <event> [lead] — Get a DM before an event\n"
+            "/l9 unsubscribe <event> [lead] — Stop DMs for an event\n"
+            "/l9 killed <boss> [time] — Log a field boss kill to get alerts before it respawns\n"
+            "/l9 respawns — Show logged field bosses and when they respawn\n"
             "/l9 help — Show all available commands and their functions\n\n"
             "**Scheduled Reminders:**\n"
-            "- Daily Guild & World Boss reminders are sent automatically at 11AM and 8PM GMT+8, and 15 minutes before.\n"
+            "- Daily Guild & World Boss reminders are sent automatically at each event's scheduled time, and 15 minutes before.\n"
             "- Each reminder includes a random MMORPG min-maxing quote.\n\n"
             "Support the App: [Buy me a coffee](https://buymeacoffee.com/l9alerts)"
         )
@@ -456,4 +914,106 @@ async def on_app_command_error(interaction: Interaction, error):
         return
     raise error
 
-bot.run(TOKEN)
\ No newline at end of file
+def low_memory_options():
+    # The bot only reads guilds, their channels and their roles; interactions
+    # arrive whatever the intents. Nothing reads messages or member lists, so
+    # neither is received or cached.
+    intents = discord.Intents.none()
+    intents.guilds = True
+    return dict(intents=intents, max_messages=None, chunk_guilds_at_startup=False,
+                member_cache_flags=discord.MemberCacheFlags.none())
+
+def default_options():
+    return dict(intents=discord.Intents.default())
+
+# discord.py gateway and cache settings, by L9_CACHE_PROFILE
+CACHE_PROFILES = {'low-memory': low_memory_options, 'default': default_options}
+CACHE_PROFILE = os.getenv('L9_CACHE_PROFILE', 'low-memory')
+
+def create_bot(db_path=DB_FILE, dispatcher_=None, clock_=None, profile=None, **bot_options):
+    """Build the bot and its store, scheduler and dispatcher.
+
+    Nothing connects to Discord until the returned bot is started, so this is
+    also the entry point for running the bot offline (see fakediscord.py).
+    ``clock_`` replaces the wall clock, e.g. with a ``clock.VirtualClock``.
+    ``profile`` names one of CACHE_PROFILES (default: ``CACHE_PROFILE``);
+    ``bot_options`` are passed through to ``commands.Bot`` and override it.
+    """
+    global bot, store, job_store, scheduler, reminder_jobs, dispatcher, clock, guild_configs, guild_events
+    global picker_indexes, countdowns, outbox, subscriptions, dm_dispatcher, respawns, banners
+    global scheduler_armed, first_alert_delivered
+    # The JSON files are only read once, to seed the SQLite store on first start
+    store = Store(db_path)
+    store.import_json(CONFIG_FILE, EVENTS_FILE, LEGACY_GUILD_ID)
+    guild_configs = store.load_configs()
+    guild_events = store.load_events()
+    subscriptions = SubscriptionIndex()
+    for guild_id, user_id, event, lead in store.load_subscriptions():
+        subscriptions.add(guild_id, user_id, event, lead)
+    subscriptions.dm_channels = store.load_dm_channels()
+    guild_schedule_keys.clear()
+    guild_indexes.clear()
+    picker_indexes = PickerIndexes()
+    # Reminder jobs persist next to the guild state, so a reminder that came due
+    # while the bot was down still runs on boot if it is within the grace period
+    job_store = SQLiteJobStore(db_path)
+    scheduler = AsyncIOScheduler(
+        jobstores={'default': job_store},
+        job_defaults={'coalesce': True, 'misfire_grace_time': MISFIRE_GRACE},
+    )
+    reminder_jobs = ReminderJobs(scheduler, fire_reminder_slot, TIMEZONE, misfire_grace_time=MISFIRE_GRACE)
+    clock = clock_ or SystemClock(TIMEZONE)
+    dispatcher = dispatcher_ or FanoutDispatcher(
+        workers=int(os.getenv('L9_DISPATCH_WORKERS', '50')),
+        global_rate=float(os.getenv('L9_GLOBAL_RATE', str(GLOBAL_RATE))),
+    )
+    # Deadlines come from the bot's clock, so the dispatcher must check them against it too
+    if dispatcher.clock is None:
+        dispatcher.clock = clock
+    # Bounded pool for subscriber DMs, under the same global rate limit as channel posts
+    dm_dispatcher = FanoutDispatcher(workers=int(os.getenv('L9_DM_WORKERS', '20')), global_bucket=dispatcher.global_bucket,
+                                     clock=clock)
+    outbox = Outbox(store, dispatcher, outbox_route, send_outbox_entry, clock, start_grace=MISFIRE_GRACE,
+                    delivered=reminder_delivered)
+    pending = outbox.load()
+    if pending:
+        print(f'{pending} reminders still pending from the last run')
+    respawns = RespawnTracker(load_field_bosses(FIELD_BOSSES_FILE), to_tick(clock.now()), grace=MISFIRE_GRACE // 60)
+    for guild_id, boss, killed_at in store.load_kills():
+        # Kills whose window passed while the bot was down, or of bosses no longer in the table
+        if boss not in respawns.bosses or not respawns.record(guild_id, boss, killed_at):
+            store.remove_kill(guild_id, boss)
+    banners = BannerCache(store, upload_banner, refresh_banner)
+    banners.load()
+    check_banners()
+    countdowns = CountdownBoard(dispatcher, edit_rate=float(os.getenv('L9_COUNTDOWN_EDIT_RATE', str(EDIT_RATE))))
+    scheduler_armed = False
+    first_alert_delivered = False
+
+    for option, value in CACHE_PROFILES[profile or CACHE_PROFILE]().items():
+        bot_options.setdefault(option, value)
+    bot = commands.Bot(command_prefix='!', **bot_options)
+    bot.tree.add_command(l9_group)
+    bot.tree.error(on_app_command_error)
+    bot.event(setup_hook)
+    bot.event(on_ready)
+    for event in ('on_guild_channel_create', 'on_guild_channel_delete', 'on_guild_channel_update'):
+        bot.add_listener(invalidate_channel_picker, event)
+    for event in ('on_guild_role_create', 'on_guild_role_delete', 'on_guild_role_update'):
+        bot.add_listener(invalidate_role_picker, event)
+    bot.add_listener(forget_guild_pickers, 'on_guild_remove')
+    bot.add_listener(forget_guild_kills, 'on_guild_remove')
+    return bot
+
+def main():
+    if not TOKEN:
+        raise RuntimeError('DISCORD_BOT_TOKEN environment variable not set. Please set it before running the bot.')
+    create_bot()
+    log_startup('import')
+    try:
+        bot.run(TOKEN)
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    main()
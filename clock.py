@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """The wall clock in ``timezone``."""
+
+    def __init__(self, timezone):
+        self.timezone = timezone
+
+    def now(self):
+        return datetime.now(self.timezone)
+
+
+class VirtualClock:
+    """A clock that only moves when told to, for simulations and tests."""
+
+    def __init__(self, start):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def set(self, when):
+        if when < self._now:
+            raise ValueError(f'cannot move the clock back from {self._now} to {when}')
+        self._now = when
+
+    def advance(self, **delta):
+        self.set(self._now + timedelta(**delta))
@@ -0,0 +1,96 @@
+import functools
+from itertools import islice
+
+import discord
+
+from occurrences import Event, OccurrenceIndex
+from reminders import format_time_12h
+
+# Edits per second the countdowns may use across all guilds, leaving the rest
+# of Discord's 50/s global limit to reminder posts
+EDIT_RATE = 5
+
+
+@functools.lru_cache(maxsize=1024)
+def schedule_index(schedule):
+    return OccurrenceIndex([Event(*entry) for entry in schedule])
+
+
+def render_countdown(schedule, now):
+    """Countdown text for a schedule (a ``reminders.schedule_key``), soonest event first.
+
+    Time remaining is a Discord relative timestamp, which every client counts
+    down by itself, so the text only changes when an event starts and its
+    next occurrence takes its place: a few edits a day, not one a minute.
+    """
+    index = schedule_index(schedule)
+    upcoming = sorted((index.next_time(idx, now), idx) for idx in range(len(index.events)))
+    lines = []
+    for event_time, idx in upcoming:
+        event = index.events[idx]
+        lines.append(f"**{event.name}**: {event_time:%A} at {format_time_12h(event.hour, event.minute)} GMT+8 "
+                     f"(<t:{int(event_time.timestamp())}:R>)")
+    return "\n".join(lines) if lines else "No events scheduled."
+
+
+def countdown_embed(text):
+    embed = discord.Embed(title="World Boss Timer", description=text, color=0x00ff99)
+    embed.set_footer(text="Counts down live. Moves on to the next occurrence after each event starts.")
+    return embed
+
+
+class CountdownBoard:
+    """Keeps every opted-in guild's countdown message current with few edits.
+
+    ``refresh`` renders each distinct schedule once per tick and queues an
+    edit only for guilds whose message shows different text, which happens
+    once per event occurrence. Queued edits
+    coalesce: a guild still waiting from an earlier tick keeps its place in
+    line but will only be sent the newest text. ``flush`` sends at most
+    ``edit_rate`` edits per second of ``interval`` through the dispatcher and
+    leaves the rest for the next tick, so edit traffic stays within budget
+    however many guilds there are.
+    """
+
+    def __init__(self, dispatcher, edit_rate=EDIT_RATE, interval=60):
+        self.dispatcher = dispatcher
+        self.budget = max(1, int(edit_rate * interval))
+        # Guild id -> text its message shows
+        self.shown = {}
+        # Guild id -> (channel_id, message_id, text), in the order they queued
+        self.pending = {}
+
+    def refresh(self, targets, now):
+        """Queue edits for ``targets``: (guild_id, channel_id, message_id, schedule) tuples."""
+        rendered = {}
+        for guild_id, channel_id, message_id, schedule in targets:
+            text = rendered.get(schedule)
+            if text is None:
+                text = rendered[schedule] = render_countdown(schedule, now)
+            if self.shown.get(guild_id) == text:
+                self.pending.pop(guild_id, None)
+            else:
+                self.pending[guild_id] = (channel_id, message_id, text)
+
+    def mark_shown(self, guild_id, text):
+        self.shown[guild_id] = text
+        self.pending.pop(guild_id, None)
+
+    def forget(self, guild_id):
+        self.shown.pop(guild_id, None)
+        self.pending.pop(guild_id, None)
+
+    async def flush(self, edit, scheduled_at):
+        """Send up to one tick's budget of queued edits with ``edit(guild_id, channel_id, message_id, text)``."""
+        batch = list(islice(self.pending.items(), self.budget))
+        for guild_id, _ in batch:
+            del self.pending[guild_id]
+        sends = [
+            (channel_id, functools.partial(self._edit, edit, guild_id, channel_id, message_id, text))
+            for guild_id, (channel_id, message_id, text) in batch
+        ]
+        return await self.dispatcher.dispatch(sends, scheduled_at)
+
+    async def _edit(self, edit, guild_id, channel_id, message_id, text):
+        await edit(guild_id, channel_id, message_id, text)
+        self.shown[guild_id] = text
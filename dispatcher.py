@@ -0,0 +1,171 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+# Discord's documented limits: 50 requests/second globally per bot token, and
+# 5 messages per 5 seconds per channel for the create-message route.
+GLOBAL_RATE = 50
+ROUTE_RATE = 5
+ROUTE_PERIOD = 5.0
+
+
+class TokenBucket:
+    """Async token bucket: ``capacity`` tokens refilled at ``rate`` per second."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_full(self):
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, retry_after):
+        """Drain the bucket after a 429 so nobody retries before ``retry_after``."""
+        self._refill()
+        self.tokens = min(self.tokens, -retry_after * self.rate)
+
+
+class Expired(Exception):
+    """Raised by a send that is past its deadline; counted as expired, not as delivered or failed."""
+
+
+class DispatchResult:
+    __slots__ = ('delivered', 'failed', 'expired', 'rate_limited', 'skews', 'errors')
+
+    def __init__(self):
+        self.delivered = 0
+        self.failed = 0
+        self.expired = 0
+        self.rate_limited = 0
+        self.skews = []
+        # Error text -> (count, first route that hit it)
+        self.errors = {}
+
+    def error(self, route, e):
+        self.failed += 1
+        text = str(e).splitlines()[0] if str(e) else type(e).__name__
+        count, first = self.errors.get(text, (0, route))
+        self.errors[text] = (count + 1, first)
+
+    def percentile(self, pct):
+        if not self.skews:
+            return 0.0
+        ordered = sorted(self.skews)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class FanoutDispatcher:
+    """Sends one message per target concurrently from a bounded worker pool.
+
+    Every send first takes a token from the global bucket and from the bucket
+    of its route (the target channel), so a wave of reminders is paced under
+    Discord's limits instead of bursting into 429s. The gap between the
+    scheduled time and each delivery is recorded as its skew.
+    """
+
+    def __init__(self, workers=50, global_rate=GLOBAL_RATE, route_rate=ROUTE_RATE, route_period=ROUTE_PERIOD,
+                 history=10000, global_bucket=None, clock=None):
+        self.workers = workers
+        # Deadlines and skews are read off ``clock`` (anything with ``now()``), else the wall clock
+        self.clock = clock
+        # Pass another dispatcher's global_bucket to share Discord's global limit with it
+        self.global_bucket = global_bucket or TokenBucket(global_rate, global_rate)
+        self.route_rate = route_rate / route_period
+        self.route_capacity = route_rate
+        self.route_buckets = {}
+        # Skews of the most recent sends across dispatches, for metrics
+        self.recent_skews = deque(maxlen=history)
+
+    def _now(self):
+        return self.clock.now().timestamp() if self.clock is not None else time.time()
+
+    def _route_bucket(self, route):
+        bucket = self.route_buckets.get(route)
+        if bucket is None:
+            bucket = self.route_buckets[route] = TokenBucket(self.route_rate, self.route_capacity)
+        return bucket
+
+    async def dispatch(self, sends, scheduled_at, deadline=None):
+        """Run ``sends``, an iterable of ``(route, coroutine_function)`` pairs.
+
+        ``scheduled_at`` is the aware datetime the sends were due. Sends still
+        queued at ``deadline``, if given, are counted as expired without
+        taking a token. Failures are logged once per dispatch, grouped by error.
+        """
+        result = DispatchResult()
+        scheduled_ts = scheduled_at.timestamp()
+        deadline_ts = deadline.timestamp() if deadline is not None else None
+        pending = asyncio.Queue()
+        for send in sends:
+            pending.put_nowait(send)
+        workers = [
+            asyncio.create_task(self._worker(pending, scheduled_ts, deadline_ts, result))
+            for _ in range(min(self.workers, pending.qsize()))
+        ]
+        await asyncio.gather(*workers)
+        # Idle route buckets are full again; drop them so the map stays small
+        for route in [r for r, b in self.route_buckets.items() if b.is_full()]:
+            del self.route_buckets[route]
+        if result.errors:
+            print(f'Errors delivering {result.failed} sends: ' + '; '.join(
+                f'{text} x{count} (first to {route})' for text, (count, route) in result.errors.items()))
+        return result
+
+    async def _worker(self, pending, scheduled_ts, deadline_ts, result):
+        while not pending.empty():
+            route, send = pending.get_nowait()
+            if deadline_ts is not None and self._now() > deadline_ts:
+                result.expired += 1
+                continue
+            route_bucket = self._route_bucket(route)
+            await route_bucket.acquire()
+            # The route bucket may have held the send past its deadline
+            if deadline_ts is not None and self._now() > deadline_ts:
+                result.expired += 1
+                continue
+            await self.global_bucket.acquire()
+            try:
+                await send()
+            except Expired:
+                result.expired += 1
+                continue
+            except discord.RateLimited as e:
+                # discord.py gave up waiting because retry_after was too long
+                result.error(route, e)
+                result.rate_limited += 1
+                route_bucket.penalize(e.retry_after)
+                continue
+            except discord.HTTPException as e:
+                result.error(route, e)
+                if e.status == 429:
+                    result.rate_limited += 1
+                    retry_after = getattr(e, 'retry_after', None) or 1.0
+                    route_bucket.penalize(retry_after)
+                continue
+            except Exception as e:
+                result.error(route, e)
+                continue
+            skew = self._now() - scheduled_ts
+            result.delivered += 1
+            result.skews.append(skew)
+            self.recent_skews.append(skew)
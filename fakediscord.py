@@ -0,0 +1,315 @@
+"""Offline stand-in for Discord's REST API and gateway.
+
+``FakeDiscord`` replaces the bot's HTTP layer (``HTTPClient.request`` and the
+webhook adapter used for interaction responses) with in-process handlers that
+answer after a configurable latency, and can answer with 429s or 5xx errors.
+``connect`` replays READY and one GUILD_CREATE per simulated guild through
+discord.py's own gateway parsers, and ``invoke`` replays an INTERACTION_CREATE
+for an ``/l9`` subcommand, so the real bot code runs end to end without a
+token or network access::
+
+    bot = app.create_bot(db_path, guild_ready_timeout=0.1)
+    fake = FakeDiscord(latency=0.05)
+    await fake.connect(bot, [guild_payload(guild_id) for guild_id in ...])
+    await fake.invoke(bot, guild_id, 'upcoming', {'count': 3})
+"""
+import asyncio
+import itertools
+import logging
+import random
+import time
+from collections import Counter
+
+import discord
+from discord.webhook.async_ import AsyncWebhookAdapter, async_context
+
+# 429s are logged where discord.py logs them, so rate-limit metrics see them too
+_log = logging.getLogger('discord.http')
+
+BOT_USER_ID = 100000000000000001
+APPLICATION_ID = 100000000000000002
+ADMIN_USER_ID = 100000000000000003
+
+# Option types from Discord's API
+OPTION_TYPES = {bool: 5, int: 4, float: 10, str: 3}
+
+_ids = itertools.count(200000000000000000)
+
+
+def new_id():
+    return next(_ids)
+
+
+def user_payload(user_id, name, bot=False):
+    return {'id': str(user_id), 'username': name, 'discriminator': '0', 'global_name': name, 'avatar': None, 'bot': bot}
+
+
+def role_payload(role_id, name, position=0):
+    return {
+        'id': str(role_id), 'name': name, 'color': 0, 'hoist': False, 'position': position,
+        'permissions': '0', 'managed': False, 'mentionable': True, 'flags': 0,
+    }
+
+
+def text_channel_payload(channel_id, guild_id, name, position=0):
+    return {
+        'id': str(channel_id), 'type': 0, 'guild_id': str(guild_id), 'name': name, 'position': position,
+        'permission_overwrites': [], 'nsfw': False, 'parent_id': None, 'topic': None,
+        'last_message_id': None, 'rate_limit_per_user': 0,
+    }
+
+
+def member_payload(user_id, name):
+    return {'user': user_payload(user_id, name), 'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00',
+            'deaf': False, 'mute': False, 'flags': 0}
+
+
+def guild_payload(guild_id, channels=1, roles=1, name=None, members=0):
+    """GUILD_CREATE payload with ``channels`` text channels, ``roles`` roles
+    and ``members`` members besides the bot.
+
+    Channel and role ids are ``guild_id * 1000 + n`` (1-based), so tests can
+    derive them without keeping the payload around.
+    """
+    return {
+        'id': str(guild_id),
+        'name': name or f'guild-{guild_id}',
+        'unavailable': False,
+        'owner_id': str(ADMIN_USER_ID),
+        'icon': None,
+        'features': [],
+        'verification_level': 0,
+        'default_message_notifications': 0,
+        'explicit_content_filter': 0,
+        'mfa_level': 0,
+        'premium_tier': 0,
+        'preferred_locale': 'en-US',
+        'nsfw_level': 0,
+        'large': False,
+        'member_count': members + 1,
+        'emojis': [],
+        'stickers': [],
+        'members': [member_payload(BOT_USER_ID, 'L9Alerts')]
+                   + [member_payload(guild_id * 1000000 + n, f'member-{n}') for n in range(1, members + 1)],
+        'voice_states': [],
+        'presences': [],
+        'threads': [],
+        'stage_instances': [],
+        'guild_scheduled_events': [],
+        'roles': [role_payload(guild_id, '@everyone')]
+                 + [role_payload(guild_id * 1000 + n, f'role-{n}', n) for n in range(1, roles + 1)],
+        'channels': [text_channel_payload(guild_id * 1000 + n, guild_id, f'channel-{n}', n)
+                     for n in range(1, channels + 1)],
+    }
+
+
+def attachment_payload(channel_id, attachment_id, filename, size=0):
+    # Signed like Discord's CDN links: valid for a day from now
+    url = (f'https://cdn.discordapp.com/attachments/{channel_id}/{attachment_id}/{filename}'
+           f'?ex={int(time.time()) + 86400:x}&is={int(time.time()):x}&hm=0')
+    return {'id': str(attachment_id), 'filename': filename, 'size': size, 'url': url, 'proxy_url': url}
+
+
+def message_payload(channel_id, payload, message_id=None, attachments=()):
+    return {
+        'id': str(message_id or new_id()),
+        'channel_id': str(channel_id),
+        'author': user_payload(BOT_USER_ID, 'L9Alerts', bot=True),
+        'content': payload.get('content') or '',
+        'timestamp': discord.utils.utcnow().isoformat(),
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': list(attachments),
+        'embeds': payload.get('embeds') or [],
+        'pinned': False,
+        'type': 0,
+        'flags': 0,
+    }
+
+
+class FakeResponse:
+    """Just enough of an aiohttp response for ``discord.HTTPException``."""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+
+class FakeWebhookAdapter(AsyncWebhookAdapter):
+    def __init__(self, fake):
+        super().__init__()
+        self.fake = fake
+
+    async def request(self, route, session=None, **kwargs):
+        await self.fake.simulate(route.method, route.path)
+        if route.path.endswith('/callback'):
+            interaction_id = int(route.webhook_id)
+            self.fake.respond(interaction_id, kwargs.get('payload'))
+            return {'interaction': {'id': str(interaction_id), 'type': 2}}
+        return message_payload(0, kwargs.get('payload') or {})
+
+
+class FakeDiscord:
+    """In-process Discord REST/gateway stand-in; see the module docstring.
+
+    ``rate_limit_rate`` and ``error_rate`` are per-request probabilities of a
+    429 (waited out for ``retry_after`` seconds, as discord.py does) and of a
+    500 (raised as ``discord.HTTPException``).
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, rate_limit_rate=0.0, retry_after=1.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.rate_limited = 0
+        self.errors = 0
+        # Last message posted to or edited in each channel
+        self.last_messages = {}
+        # Messages with attachments, by id, so their links can be fetched again
+        self.uploads = {}
+        self._responses = {}
+
+    # -- REST ----------------------------------------------------------------
+
+    def install(self, bot):
+        bot.http.request = self.request
+        async_context.set(FakeWebhookAdapter(self))
+
+    async def simulate(self, method, path):
+        self.requests[f'{method} {path}'] += 1
+        while self.rate_limit_rate and self.random.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            _log.warning('We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.',
+                         method, path, self.retry_after)
+            await asyncio.sleep(self.retry_after)
+        await asyncio.sleep(self.latency + self.jitter * self.random.random())
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            raise discord.HTTPException(FakeResponse(500, 'Internal Server Error'), 'simulated server error')
+
+    async def request(self, route, *, files=None, form=None, **kwargs):
+        await self.simulate(route.method, route.path)
+        payload = kwargs.get('json') or {}
+        if form:
+            # Multipart sends carry the JSON payload as the first form field
+            payload = discord.utils._from_json(form[0]['value'])
+        method, path = route.method, route.path
+        # Route only keeps the channel/guild/webhook ids; others are read off the URL
+        last_id = route.url.rsplit('/', 1)[-1]
+        if method == 'POST' and path == '/channels/{channel_id}/messages':
+            attachments = [attachment_payload(route.channel_id, new_id(), f.filename) for f in files or ()]
+            message = message_payload(route.channel_id, payload, attachments=attachments)
+            if attachments:
+                self.uploads[message['id']] = message
+            self.last_messages[route.channel_id] = message
+            return message
+        if method == 'PATCH' and path == '/channels/{channel_id}/messages/{message_id}':
+            message = message_payload(route.channel_id, payload, last_id)
+            self.last_messages[route.channel_id] = message
+            return message
+        if method == 'GET' and path == '/channels/{channel_id}/messages/{message_id}':
+            message = (self.uploads.get(last_id) or self.last_messages.get(route.channel_id)
+                       or message_payload(route.channel_id, {}, last_id))
+            # Fetching a message signs its attachment links afresh
+            return dict(message, attachments=[attachment_payload(route.channel_id, a['id'], a['filename'])
+                                              for a in message['attachments']])
+        if method == 'POST' and path == '/users/@me/channels':
+            return {'id': str(new_id()), 'type': 1, 'recipients': [user_payload(payload['recipient_id'], 'player')]}
+        if method == 'PUT' and path == '/applications/{application_id}/guilds/{guild_id}/commands':
+            return [dict(command, id=str(new_id()), application_id=str(APPLICATION_ID), guild_id=str(route.guild_id),
+                         version='1') for command in payload]
+        if method == 'PUT' and path == '/applications/{application_id}/commands':
+            return [dict(command, id=str(new_id()), application_id=str(APPLICATION_ID), version='1')
+                    for command in payload]
+        return None
+
+    # -- gateway -------------------------------------------------------------
+
+    async def connect(self, bot, guilds):
+        """Log ``bot`` in and replay READY followed by GUILD_CREATE for ``guilds``."""
+        self.install(bot)
+        # What Client.login does, minus the token check
+        await bot._async_setup_hook()
+        state = bot._connection
+        state.application_id = APPLICATION_ID
+        await bot.setup_hook()
+        state.parsers['READY']({
+            'v': 10,
+            'user': user_payload(BOT_USER_ID, 'L9Alerts', bot=True),
+            'guilds': [{'id': guild['id'], 'unavailable': True} for guild in guilds],
+            'session_id': 'fake-session',
+            'resume_gateway_url': 'wss://gateway.invalid',
+            'application': {'id': str(APPLICATION_ID), 'flags': 0},
+        })
+        for guild in guilds:
+            state.parsers['GUILD_CREATE'](guild)
+        await bot.wait_until_ready()
+        # Let on_ready, dispatched in the same step, run before returning
+        await asyncio.sleep(0)
+
+    def dispatch(self, bot, event, data):
+        """Replay any other gateway event, e.g. ``GUILD_ROLE_CREATE``."""
+        bot._connection.parsers[event](data)
+
+    def respond(self, interaction_id, payload):
+        future = self._responses.pop(interaction_id, None)
+        if future is not None and not future.done():
+            future.set_result(payload)
+
+    async def invoke(self, bot, guild_id, command, options=None, channel_id=None, user_id=ADMIN_USER_ID,
+                     permissions=8, focused=None, timeout=10):
+        """Replay ``/l9 <command>`` and return the interaction response payload.
+
+        With ``focused`` set to an option name, replays the autocomplete request
+        for that option instead; the response then carries the choices.
+        """
+        interaction_id = new_id()
+        channel_id = channel_id or guild_id * 1000 + 1
+        data = {
+            'id': str(interaction_id),
+            'application_id': str(APPLICATION_ID),
+            'type': 4 if focused else 2,
+            'token': f'fake-token-{interaction_id}',
+            'version': 1,
+            'guild_id': str(guild_id),
+            'channel_id': str(channel_id),
+            'channel': text_channel_payload(channel_id, guild_id, 'channel'),
+            'member': {
+                'user': user_payload(user_id, 'admin'),
+                'roles': [],
+                'permissions': str(permissions),
+                'joined_at': discord.utils.utcnow().isoformat(),
+                'deaf': False,
+                'mute': False,
+                'flags': 0,
+            },
+            'app_permissions': str(discord.Permissions.all().value),
+            'locale': 'en-US',
+            'guild_locale': 'en-US',
+            'attachment_size_limit': 25 * 1024 * 1024,
+            'entitlements': [],
+            'authorizing_integration_owners': {'0': str(guild_id)},
+            'context': 0,
+            'data': {
+                'id': str(new_id()),
+                'name': 'l9',
+                'type': 1,
+                'options': [{
+                    'name': command,
+                    'type': 1,
+                    'options': [{'name': name, 'type': OPTION_TYPES[type(value)], 'value': value,
+                                 'focused': name == focused}
+                                for name, value in (options or {}).items()],
+                }],
+            },
+        }
+        future = self._responses[interaction_id] = asyncio.get_running_loop().create_future()
+        bot._connection.parsers['INTERACTION_CREATE'](data)
+        return await asyncio.wait_for(future, timeout)
@@ -0,0 +1,235 @@
+import pickle
+import sqlite3
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+from occurrences import week_offsets
+from storage import connect
+
+# Reminder lead times in minutes before an event, and how each is labelled
+LEAD_TIMES = {15: '15 min before', 0: 'Start'}
+
+
+def minute_of_week(dt):
+    return dt.weekday() * 1440 + dt.hour * 60 + dt.minute
+
+
+def job_id(minute_of_day, lead):
+    return f"reminder:{minute_of_day // 60:02d}{minute_of_day % 60:02d}:{lead}"
+
+
+class SQLiteJobStore(BaseJobStore):
+    """APScheduler job store in a local SQLite file.
+
+    Same layout as APScheduler's SQLAlchemyJobStore (id, next_run_time and the
+    pickled job state), without the SQLAlchemy dependency. Jobs survive a
+    restart with their last next_run_time, so the scheduler can tell on boot
+    which runs were missed and apply misfire grace and coalescing to them.
+    """
+
+    def __init__(self, path, tablename='apscheduler_jobs', pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.path = path
+        self.tablename = tablename
+        self.pickle_protocol = pickle_protocol
+        self._conn = None
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self._conn = connect(self.path)
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.tablename} "
+                "(id TEXT PRIMARY KEY, next_run_time REAL, job_state BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.tablename}_next_run_time ON {self.tablename} (next_run_time)"
+            )
+
+    def lookup_job(self, job_id):
+        row = self._conn.execute(f"SELECT job_state FROM {self.tablename} WHERE id = ?", (job_id,)).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        row = self._conn.execute(
+            f"SELECT next_run_time FROM {self.tablename} WHERE next_run_time IS NOT NULL "
+            "ORDER BY next_run_time LIMIT 1"
+        ).fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def count_jobs(self):
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.tablename}").fetchone()[0]
+
+    def add_job(self, job):
+        try:
+            with self._conn:
+                self._conn.execute(
+                    f"INSERT INTO {self.tablename} (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                    (job.id, datetime_to_utc_timestamp(job.next_run_time),
+                     pickle.dumps(job.__getstate__(), self.pickle_protocol)),
+                )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        with self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE {self.tablename} SET next_run_time = ?, job_state = ? WHERE id = ?",
+                (datetime_to_utc_timestamp(job.next_run_time),
+                 pickle.dumps(job.__getstate__(), self.pickle_protocol), job.id),
+            )
+        if cursor.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        with self._conn:
+            cursor = self._conn.execute(f"DELETE FROM {self.tablename} WHERE id = ?", (job_id,))
+        if cursor.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        with self._conn:
+            self._conn.execute(f"DELETE FROM {self.tablename}")
+
+    def shutdown(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(job_state)
+        job_state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where='', params=()):
+        jobs = []
+        failed_job_ids = []
+        rows = self._conn.execute(
+            f"SELECT id, job_state FROM {self.tablename} {where} ORDER BY next_run_time", params
+        ).fetchall()
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.append(job_id)
+        # Remove all the jobs we failed to restore
+        if failed_job_ids:
+            with self._conn:
+                self._conn.executemany(f"DELETE FROM {self.tablename} WHERE id = ?", [(i,) for i in failed_job_ids])
+        return jobs
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (path={self.path})>"
+
+
+class ReminderJobs:
+    """Keeps APScheduler jobs in step with every guild's stored schedule.
+
+    There is one job per (event time of day, lead time), with a stable id and a
+    cron trigger on the weekdays on which at least one guild has an event at
+    that time. Guilds that share an event time share its job; ``recipients``
+    resolves which guilds a firing is for.
+
+    ``update_guild`` diffs a guild's new schedule against the one it registered
+    last, so an edit only adds, reschedules or removes the jobs for the times
+    that changed, never the whole job set. With a persistent job store, jobs
+    restored on boot that already match are left untouched so their missed
+    runs can still be caught up.
+
+    ``misfire_grace_time`` (seconds) is how late a "Start" reminder may still
+    run; earlier reminders are also dropped once their event has started.
+    """
+
+    def __init__(self, scheduler, func, timezone, leads=LEAD_TIMES, misfire_grace_time=600):
+        self.scheduler = scheduler
+        self.func = func
+        self.timezone = timezone
+        self.leads = leads
+        self.misfire_grace_time = misfire_grace_time
+        # Minute-of-week of an event -> guild ids with an event then
+        self.slot_guilds = {}
+        # Guild id -> minute-of-week slots it registered
+        self.guild_slots = {}
+
+    def update_guild(self, guild_id, events_data):
+        new = frozenset(offset // 60 for event in events_data for offset in week_offsets(event))
+        old = self.guild_slots.get(guild_id, frozenset())
+        if new == old:
+            return
+        changed = set()
+        for slot in old - new:
+            guilds = self.slot_guilds[slot]
+            guilds.discard(guild_id)
+            if not guilds:
+                del self.slot_guilds[slot]
+                changed.add(slot % 1440)
+        for slot in new - old:
+            guilds = self.slot_guilds.setdefault(slot, set())
+            if not guilds:
+                changed.add(slot % 1440)
+            guilds.add(guild_id)
+        if new:
+            self.guild_slots[guild_id] = new
+        else:
+            self.guild_slots.pop(guild_id, None)
+        for minute_of_day in changed:
+            self._sync_jobs(minute_of_day)
+
+    def remove_guild(self, guild_id):
+        self.update_guild(guild_id, ())
+
+    def prune(self):
+        """Remove stored reminder jobs no registered guild needs any more."""
+        wanted = {job_id(slot % 1440, lead) for slot in self.slot_guilds for lead in self.leads}
+        for job in self.scheduler.get_jobs():
+            if job.id.startswith('reminder:') and job.id not in wanted:
+                self.scheduler.remove_job(job.id)
+
+    def recipients(self, event_time):
+        """Guild ids with an event starting at ``event_time``."""
+        return self.slot_guilds.get(minute_of_week(event_time), set())
+
+    def _sync_jobs(self, minute_of_day):
+        days = sorted(day for day in range(7) if day * 1440 + minute_of_day in self.slot_guilds)
+        for lead in self.leads:
+            if not days:
+                try:
+                    self.scheduler.remove_job(job_id(minute_of_day, lead))
+                except JobLookupError:
+                    pass
+                continue
+            fire = minute_of_day - lead
+            # A lead that crosses midnight fires on the previous weekday
+            day_shift = fire // 1440
+            fire %= 1440
+            fire_days = sorted((day + day_shift) % 7 for day in days)
+            trigger = CronTrigger(
+                day_of_week=','.join(str(day) for day in fire_days),
+                hour=fire // 60, minute=fire % 60, timezone=self.timezone,
+            )
+            args = (minute_of_day // 60, minute_of_day % 60, lead)
+            grace = min(self.misfire_grace_time, lead * 60) if lead else self.misfire_grace_time
+            existing = self.scheduler.get_job(job_id(minute_of_day, lead))
+            if (existing is not None and repr(existing.trigger) == repr(trigger)
+                    and tuple(existing.args) == args and existing.misfire_grace_time == grace):
+                continue
+            self.scheduler.add_job(
+                self.func, trigger, args=list(args), id=job_id(minute_of_day, lead),
+                replace_existing=True, misfire_grace_time=grace, coalesce=True
+            )
@@ -0,0 +1,205 @@
+import asyncio
+import functools
+import logging
+import math
+import time
+
+from aiohttp import web
+
+# Buckets in seconds, from sub-second interaction handling up to the misfire grace
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def format_value(value):
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def _samples(self):
+        if not self.values and not self.labels:
+            return [f'{self.name} 0.0']
+        return [f'{self.name}{format_labels(self.labels, key)} {format_value(value)}'
+                for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """Gauge that is either set directly or read from ``callback`` on scrape."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback=None):
+        super().__init__(name, help_text)
+        self.callback = callback
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def _samples(self):
+        value = self.value
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception:
+                value = math.nan
+        return [f'{self.name} {format_value(value)}']
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts..., +Inf count, sum]
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(self.buckets)] += 1
+        series[-1] += value
+
+    def time(self, **labels):
+        """Decorator recording the run time of a coroutine function."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def _samples(self):
+        lines = []
+        for key, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = format_labels(self.labels, key, [('le', format_value(bound))])
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.labels, key)} {format_value(series[-1])}')
+            lines.append(f'{self.name}_count{format_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+DELIVERY_LAG = registry.register(Histogram(
+    'l9_reminder_delivery_lag_seconds', 'Delay between a reminder being due and its delivery.', labels=('when',)))
+SEND_FAILURES = registry.register(Counter(
+    'l9_reminder_send_failures_total', 'Reminder sends that raised.', labels=('when',)))
+RATE_LIMITED = registry.register(Counter(
+    'l9_discord_rate_limited_total', 'HTTP 429 responses from Discord, including ones retried by discord.py.'))
+OUTBOX_EXPIRED = registry.register(Counter(
+    'l9_outbox_expired_total', 'Reminders given up on because their deadline passed before delivery.'))
+EVENT_LOOP_LAG = registry.register(Histogram(
+    'l9_event_loop_lag_seconds', 'How late the event loop woke a periodic probe task.'))
+INTERACTION_DURATION = registry.register(Histogram(
+    'l9_interaction_duration_seconds', 'Time spent in interaction callbacks.', labels=('callback',)))
+
+
+class RateLimitLogCounter(logging.Handler):
+    """Counts the 429s discord.py handles internally, which it only logs."""
+
+    def emit(self, record):
+        if '429' in record.getMessage():
+            RATE_LIMITED.inc()
+
+
+async def monitor_event_loop(interval=0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+
+async def start_http_server(port, ready_check, host='0.0.0.0'):
+    """Serve /metrics (Prometheus text format), /healthz and /readyz."""
+
+    async def metrics_handler(request):
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def liveness_handler(request):
+        # Answering at all means the event loop is alive
+        return web.Response(text='ok\n')
+
+    async def readiness_handler(request):
+        ready = ready_check()
+        return web.Response(text='ready\n' if ready else 'not ready\n', status=200 if ready else 503)
+
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler)
+    app.router.add_get('/healthz', liveness_handler)
+    app.router.add_get('/readyz', readiness_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
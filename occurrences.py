@@ -0,0 +1,143 @@
+import sys
+from bisect import bisect_left, insort
+from datetime import timedelta
+from itertools import islice, takewhile
+
+DAYS_MAP = {
+    "Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3,
+    "Friday": 4, "Saturday": 5, "Sunday": 6, "Everyday": None
+}
+
+WEEK_SECONDS = 7 * 86400
+
+
+class Event:
+    """One weekly schedule entry.
+
+    Records are never changed in place: an edit swaps in a ``replace``d copy,
+    so guilds share the records of entries they have not edited.
+    """
+
+    __slots__ = ('name', 'day', 'hour', 'minute')
+
+    def __init__(self, name, day, hour, minute):
+        # The same few names repeat across every guild; interned, each is stored once
+        self.name = sys.intern(name)
+        self.day = sys.intern(day)
+        self.hour = hour
+        self.minute = minute
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['day'], data['hour'], data['minute'])
+
+    def replace(self, **changes):
+        return Event(**{**{field: getattr(self, field) for field in self.__slots__}, **changes})
+
+    def __repr__(self):
+        return f"Event({self.name!r}, {self.day!r}, {self.hour}, {self.minute})"
+
+
+def week_offsets(event):
+    """Seconds since Monday 00:00 of every weekly occurrence of ``event``."""
+    base = event.hour * 3600 + event.minute * 60
+    weekday = DAYS_MAP.get(event.day)
+    if weekday is None:
+        return [day * 86400 + base for day in range(7)]
+    return [weekday * 86400 + base]
+
+
+class OccurrenceIndex:
+    """Weekly timeline of a schedule's occurrences.
+
+    Every schedule entry repeats weekly, so one sorted week of occurrences
+    describes all future ones. Lookups bisect into the week at ``now`` and
+    walk forward, wrapping into following weeks, so they cost O(log n) plus
+    the number of results. ``update`` re-indexes a single edited event.
+
+    Results are ``(event_time, event_idx)`` pairs, where ``event_time`` is an
+    aware datetime in ``now``'s timezone (fixed-offset GMT+8, so week
+    arithmetic is exact) and ``event_idx`` indexes ``events``.
+    """
+
+    def __init__(self, events_data):
+        self.events = list(events_data)
+        # Sorted (offset, event_idx) entries, overall and per event name
+        self.timeline = []
+        self.by_name = {}
+        self.offsets = {}
+        self.names = {}
+        for idx, event in enumerate(self.events):
+            self._add(idx, event)
+
+    def _add(self, idx, event):
+        offsets = week_offsets(event)
+        self.offsets[idx] = offsets
+        # Remembered so removal does not depend on the replaced event
+        self.names[idx] = event.name
+        name_entries = self.by_name.setdefault(event.name, [])
+        for offset in offsets:
+            insort(self.timeline, (offset, idx))
+            insort(name_entries, (offset, idx))
+
+    def _remove(self, idx):
+        name = self.names.pop(idx)
+        name_entries = self.by_name[name]
+        for offset in self.offsets.pop(idx):
+            del self.timeline[bisect_left(self.timeline, (offset, idx))]
+            del name_entries[bisect_left(name_entries, (offset, idx))]
+        if not name_entries:
+            del self.by_name[name]
+
+    def update(self, idx, event):
+        self._remove(idx)
+        self.events[idx] = event
+        self._add(idx, event)
+
+    def _walk(self, entries, now):
+        if not entries:
+            return
+        week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        position = (now - week_start).total_seconds()
+        # Occurrences at exactly ``now`` still count as upcoming
+        i = bisect_left(entries, (position, -1))
+        week = 0
+        while True:
+            if i == len(entries):
+                i = 0
+                week += 1
+            offset, idx = entries[i]
+            yield week_start + timedelta(seconds=offset + week * WEEK_SECONDS), idx
+            i += 1
+
+    def starting_at(self, when):
+        """Indexes of the events with an occurrence starting exactly at ``when``."""
+        week_start = (when - timedelta(days=when.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        position = (when - week_start).total_seconds()
+        i = bisect_left(self.timeline, (position, -1))
+        found = []
+        while i < len(self.timeline) and self.timeline[i][0] == position:
+            found.append(self.timeline[i][1])
+            i += 1
+        return found
+
+    def next_time(self, idx, now):
+        """Next occurrence of the event at position ``idx``."""
+        entries = [(offset, idx) for offset in self.offsets[idx]]
+        return next(self._walk(entries, now))[0]
+
+    def next_occurrence(self, name, now):
+        """Next occurrence of any event called ``name``, or None."""
+        return next(self._walk(self.by_name.get(name, ()), now), None)
+
+    def upcoming(self, now, count):
+        """The next ``count`` occurrences across the schedule."""
+        return list(islice(self._walk(self.timeline, now), count))
+
+    def within(self, now, seconds):
+        """Every occurrence starting in the next ``seconds`` seconds."""
+        end = now + timedelta(seconds=seconds)
+        # A window longer than a week would otherwise repeat the whole timeline forever
+        horizon = len(self.timeline) * (int(seconds // WEEK_SECONDS) + 1)
+        return list(takewhile(lambda occurrence: occurrence[0] <= end,
+                              islice(self._walk(self.timeline, now), horizon)))
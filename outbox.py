@@ -0,0 +1,195 @@
+import asyncio
+import functools
+import hashlib
+import random
+
+from dispatcher import Expired
+from metrics import OUTBOX_EXPIRED
+
+PENDING = 'pending'
+SENT = 'sent'
+EXPIRED = 'expired'
+
+# Retry delays double from BACKOFF_BASE up to BACKOFF_MAX seconds, with full jitter
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+
+# Delivered and expired rows are kept this long, for debugging
+HISTORY = 86400
+
+
+def outbox_key(guild_id, event_time, lead, boss=None):
+    """Idempotency key of one reminder: guild, event occurrence (or respawning boss) and lead time."""
+    if boss is not None:
+        return f"{guild_id}:{boss}:{int(event_time.timestamp())}:{lead}"
+    return f"{guild_id}:{int(event_time.timestamp())}:{lead}"
+
+
+def message_nonce(key):
+    # Discord drops a second message with the same nonce sent shortly after the
+    # first, which covers a crash between sending and recording the send.
+    # Nonces are limited to 25 characters.
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+class OutboxEntry:
+    __slots__ = ('key', 'guild_id', 'lead', 'event_at', 'deadline', 'attempts', 'next_attempt', 'boss')
+
+    def __init__(self, key, guild_id, lead, event_at, deadline, attempts=0, next_attempt=0.0, boss=None):
+        self.key = key
+        self.guild_id = guild_id
+        self.lead = lead
+        self.event_at = event_at
+        self.deadline = deadline
+        self.attempts = attempts
+        self.next_attempt = next_attempt
+        # Field boss of a respawn alert; None for schedule reminders
+        self.boss = boss
+
+
+class Outbox:
+    """Persistent outbox for reminder posts.
+
+    Every reminder is recorded in the store under its idempotency key before
+    it is sent. A send that fails is retried with jittered exponential
+    backoff until its deadline: the event's start for "15 min before"
+    reminders, and ``start_grace`` seconds after it for "Start" reminders.
+    Keys already sent are skipped, so a reminder job that runs again (for
+    example after a restart) does not post twice, and ``load`` picks up the
+    reminders still pending from the last run for ``run`` to drain in bulk.
+    Field boss respawn alerts go through the same outbox, with the window
+    opening as their event time.
+
+    ``route(guild_id)`` gives the channel id to send to, or None when the
+    guild has nowhere to send; ``send(entry)`` posts the reminder.
+    ``delivered(entry, lag)``, if given, is called after every successful
+    send, first attempt or retry, with the seconds since the reminder was due.
+    A send attempted past its deadline raises ``dispatcher.Expired``.
+    """
+
+    def __init__(self, store, dispatcher, route, send, clock, start_grace=600,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, delivered=None):
+        self.store = store
+        self.dispatcher = dispatcher
+        self.route = route
+        self.send = send
+        self.delivered = delivered
+        self.clock = clock
+        self.start_grace = start_grace
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Key -> entry, for reminders not yet delivered
+        self.pending = {}
+        # Key -> deadline, for reminders delivered or given up on; forgotten after the deadline
+        self.done = {}
+        self.in_flight = set()
+        self._wakeup = asyncio.Event()
+        self._pruned_at = 0.0
+
+    def _now(self):
+        return self.clock.now().timestamp()
+
+    def load(self):
+        """Restore the previous run's outbox; returns how many reminders are still pending."""
+        now = self._now()
+        for key, guild_id, lead, event_at, deadline, attempts, next_attempt, state, boss in self.store.load_outbox(now):
+            if state == PENDING:
+                self.pending[key] = OutboxEntry(key, guild_id, lead, event_at, deadline, attempts, next_attempt, boss)
+            else:
+                self.done[key] = deadline
+        return len(self.pending)
+
+    def enqueue(self, guild_id, lead, event_time, boss=None):
+        """Record a reminder; returns its entry, or None if it was already recorded."""
+        key = outbox_key(guild_id, event_time, lead, boss)
+        if key in self.pending or key in self.done:
+            return None
+        event_at = event_time.timestamp()
+        deadline = event_at + (self.start_grace if lead == 0 else 0)
+        entry = self.pending[key] = OutboxEntry(key, guild_id, lead, event_at, deadline,
+                                                next_attempt=self._now(), boss=boss)
+        self._save(entry, PENDING)
+        return entry
+
+    def _save(self, entry, state):
+        self.store.save_outbox(entry.key, entry.guild_id, entry.lead, entry.event_at, entry.deadline,
+                               entry.attempts, entry.next_attempt, state, entry.boss)
+
+    def _finish(self, entry, state):
+        self.pending.pop(entry.key, None)
+        self.done[entry.key] = entry.deadline
+        self.store.set_outbox_state(entry.key, state)
+        if state == EXPIRED:
+            OUTBOX_EXPIRED.inc()
+            print(f'Gave up on reminder {entry.key} after {entry.attempts} attempts')
+
+    async def deliver(self, entries, scheduled_at):
+        """Send ``entries`` through the dispatcher; failures are rescheduled."""
+        sends = []
+        for entry in entries:
+            channel_id = self.route(entry.guild_id)
+            if channel_id is None:
+                self._finish(entry, EXPIRED)
+                continue
+            self.in_flight.add(entry.key)
+            sends.append((channel_id, functools.partial(self._attempt, entry)))
+        return await self.dispatcher.dispatch(sends, scheduled_at)
+
+    async def _attempt(self, entry):
+        try:
+            if self._now() > entry.deadline:
+                self._finish(entry, EXPIRED)
+                raise Expired(entry.key)
+            entry.attempts += 1
+            try:
+                await self.send(entry)
+            except Expired:
+                # The send found the entry obsolete (e.g. a replaced kill); retrying cannot help
+                self._finish(entry, EXPIRED)
+                raise
+            except Exception:
+                self._reschedule(entry)
+                raise
+            self._finish(entry, SENT)
+            if self.delivered is not None:
+                # Measured from when the reminder was due, not from the retry
+                self.delivered(entry, self._now() - (entry.event_at - entry.lead * 60))
+        finally:
+            self.in_flight.discard(entry.key)
+
+    def _reschedule(self, entry):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (entry.attempts - 1)))
+        entry.next_attempt = self._now() + delay
+        if entry.next_attempt > entry.deadline:
+            self._finish(entry, EXPIRED)
+            return
+        self._save(entry, PENDING)
+        self._wakeup.set()
+
+    async def run(self):
+        """Retry failed reminders when they come due, including those left over from the last run."""
+        while True:
+            now = self._now()
+            self._expire(now)
+            due = [entry for entry in self.pending.values()
+                   if entry.next_attempt <= now and entry.key not in self.in_flight]
+            if due:
+                result = await self.deliver(due, self.clock.now())
+                print(f'Outbox: retried {len(due)}, delivered {result.delivered}, expired {result.expired}, '
+                      f'{len(self.pending)} pending')
+                continue
+            waiting = [entry.next_attempt for entry in self.pending.values() if entry.key not in self.in_flight]
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(waiting) - now if waiting else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def _expire(self, now):
+        for entry in [e for e in self.pending.values() if e.deadline < now and e.key not in self.in_flight]:
+            self._finish(entry, EXPIRED)
+        for key in [k for k, deadline in self.done.items() if deadline < now]:
+            del self.done[key]
+        if now - self._pruned_at > 3600:
+            self._pruned_at = now
+            self.store.prune_outbox(now - HISTORY)
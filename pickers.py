@@ -0,0 +1,91 @@
+from bisect import bisect_left
+
+# Discord's limit on autocomplete choices and select options
+MAX_CHOICES = 25
+
+WORD_SEPARATORS = ' -_/|.:'
+
+
+def word_starts(name):
+    """Positions in ``name`` where a word starts."""
+    return [0] + [i for i in range(1, len(name)) if name[i - 1] in WORD_SEPARATORS and name[i] not in WORD_SEPARATORS]
+
+
+class PrefixIndex:
+    """Case-insensitive prefix search over (name, id) pairs.
+
+    Every word of a name is a key, so "boss" finds "guild-boss-alerts" as
+    well as "Boss Hunters". Keys are kept sorted, so a lookup is a bisect
+    plus a walk over the matches: O(log n + results).
+    """
+
+    __slots__ = ('items', 'keys')
+
+    def __init__(self, items):
+        # (name, id) pairs in display order; an empty query returns the first ones
+        self.items = list(items)
+        keys = []
+        for order, (name, item_id) in enumerate(self.items):
+            folded = name.casefold()
+            for start in word_starts(folded):
+                # Whole-name matches sort before later-word matches of the same text
+                keys.append((folded[start:], start > 0, order))
+        keys.sort()
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, query, limit=MAX_CHOICES):
+        query = query.strip().casefold()
+        if not query:
+            return self.items[:limit]
+        results = []
+        seen = set()
+        i = bisect_left(self.keys, (query,))
+        while i < len(self.keys) and len(results) < limit:
+            key, _, order = self.keys[i]
+            if not key.startswith(query):
+                break
+            if order not in seen:
+                seen.add(order)
+                results.append(self.items[order])
+            i += 1
+        return results
+
+
+class PickerIndexes:
+    """Per-guild channel and role indexes, built on first use.
+
+    Whatever changes a guild's channels or roles must call the matching
+    ``invalidate_*`` method; the bot wires them to the gateway events.
+    """
+
+    def __init__(self):
+        self.channels = {}
+        self.roles = {}
+
+    def channel_index(self, guild):
+        index = self.channels.get(guild.id)
+        if index is None:
+            index = self.channels[guild.id] = PrefixIndex(
+                (channel.name, channel.id) for channel in guild.text_channels)
+        return index
+
+    def role_index(self, guild):
+        index = self.roles.get(guild.id)
+        if index is None:
+            # Highest roles first, as in the server settings
+            index = self.roles[guild.id] = PrefixIndex(
+                (role.name, role.id) for role in reversed(guild.roles) if not role.is_default())
+        return index
+
+    def invalidate_channels(self, guild_id):
+        self.channels.pop(guild_id, None)
+
+    def invalidate_roles(self, guild_id):
+        self.roles.pop(guild_id, None)
+
+    def forget(self, guild_id):
+        self.invalidate_channels(guild_id)
+        self.invalidate_roles(guild_id)
@@ -0,0 +1,146 @@
+import functools
+import random
+from datetime import datetime
+
+import discord
+import pytz
+
+from occurrences import Event, OccurrenceIndex
+
+TIMEZONE = pytz.timezone('Asia/Singapore')
+
+# Quotes about min-maxing
+quotes = [
+    "Min-maxing: because every stat point counts!",
+    "A true hero knows the value of optimization.",
+    "Why settle for average when you can be legendary?",
+    "In Lord Nine, min-maxing is the path to glory.",
+    "The difference between good and great is in the details.",
+]
+
+# World bosses, in summary order, and the image in assets/banners each one's
+# reminders show (see banners.py)
+WORLD_BOSS_BANNERS = {
+    "Ratan, Parto, Nedra": "ratan-parto-nedra",
+}
+
+SUPPORT_LINK = "[Buy me a coffee](https://buymeacoffee.com/l9alerts)"
+DIVIDER = "\n---------------------------------------------\n\n**World Boss Timer**\n"
+
+# Reminder kind used by /l9 samplealert
+SAMPLE = 'Sample'
+
+
+def get_time_remaining(event_time, now=None):
+    if now is None:
+        now = datetime.now(TIMEZONE)
+    delta = event_time - now
+    total_seconds = int(delta.total_seconds())
+    days = total_seconds // 86400
+    hours = (total_seconds % 86400) // 3600
+    minutes = (total_seconds % 3600) // 60
+    return f"{days}d {hours}h {minutes}m"
+
+
+def format_time_12h(hour, minute):
+    suffix = "AM" if hour < 12 or hour == 24 else "PM"
+    hour_12 = hour % 12
+    if hour_12 == 0:
+        hour_12 = 12
+    return f"{hour_12}:{minute:02d} {suffix}"
+
+
+def schedule_key(events_data):
+    """Hashable snapshot of a schedule; any edit produces a different key."""
+    return tuple((e.name, e.day, e.hour, e.minute) for e in events_data)
+
+
+class SummaryTemplate:
+    """Daily Guild & World Boss summary compiled for one schedule and kind.
+
+    Everything that does not depend on the clock is formatted once, at compile
+    time. ``render`` only fills in the time-remaining fields, and memoises the
+    embed for the last tick so every guild sharing the schedule reuses it.
+    """
+
+    def __init__(self, schedule, when):
+        events_data = [Event(*entry) for entry in schedule]
+        self.index = OccurrenceIndex(events_data)
+        self.when = when
+        self.title = f"Daily Guild & World Boss Reminder ({when})"
+        header = "📢 **ATTENTION**📢\n\n" if when == SAMPLE else "📢 **DAILY GUILD & WORLD BOSS REMINDER** 📢\n\n"
+        # Pieces are either literal text or (event_idx, format) pairs whose
+        # format takes the time remaining
+        self.pieces = [header]
+        guild_boss = next((i for i, e in enumerate(events_data) if 'Guild Boss' in e.name), None)
+        if guild_boss is not None:
+            event = events_data[guild_boss]
+            self.pieces.append((guild_boss, f"**Guild Boss Schedule**:\n{event.day} at {format_time_12h(event.hour, event.minute)} GMT+8 (Time Remaining: {{}})\n"))
+        else:
+            self.pieces.append("Guild Boss Schedule: Not set\n")
+        garbana = next((i for i, e in enumerate(events_data) if 'Garbana' in e.name), None)
+        if garbana is not None:
+            event = events_data[garbana]
+            self.pieces.append((garbana, f"**Garbana Rally Schedule**:\n{event.day} at {format_time_12h(event.hour, event.minute)} GMT+8 (Time Remaining: {{}})\n"))
+        else:
+            self.pieces.append("Garbana Rally Schedule: Not set\n")
+        self.pieces.append(DIVIDER)
+        # World boss lines in summary order, and the boss each event belongs to
+        self.boss_lines = []
+        self.event_boss = {}
+        for boss in WORLD_BOSS_BANNERS:
+            for idx, event in enumerate(events_data):
+                if 'World Boss' not in event.name or boss not in event.name:
+                    continue
+                # Custom wording for 15 min before
+                prepare = "Prepare to move in 15 mins, " if when == '15 min before' else ""
+                self.boss_lines.append((idx, f"- {event.name} : {event.day} at {format_time_12h(event.hour, event.minute)} GMT+8 ({prepare}Time Remaining: {{}})\n"))
+                self.event_boss.setdefault(idx, boss)
+        self.line_formats = dict(reversed(self.boss_lines))
+        self.banner = next(iter(WORLD_BOSS_BANNERS.values()))
+        self._tick = None
+        self._embed = None
+
+    def _fill(self, idx, fmt, now):
+        return fmt.format(get_time_remaining(self.index.next_time(idx, now), now))
+
+    def _world_boss_text(self, now):
+        if self.when != SAMPLE:
+            text = "".join(self._fill(idx, fmt, now) for idx, fmt in self.boss_lines)
+            return text or "No world boss events configured.\n"
+        # The sample only shows the soonest occurrence of each boss within 15 minutes
+        soonest = {}
+        for event_time, idx in self.index.within(now, 900):
+            boss = self.event_boss.get(idx)
+            if boss is not None and boss not in soonest:
+                soonest[boss] = (event_time, idx)
+        text = "".join(
+            self.line_formats[soonest[boss][1]].format(get_time_remaining(soonest[boss][0], now))
+            for boss in WORLD_BOSS_BANNERS if boss in soonest
+        )
+        return text or "No world boss event is within the next 15 minutes.\n"
+
+    def render(self, now, banner_url=None):
+        """``banner_url`` is the current URL of ``self.banner``, if it has one."""
+        if self._tick == (now, banner_url):
+            return self._embed
+        description = "".join(
+            piece if isinstance(piece, str) else self._fill(piece[0], piece[1], now)
+            for piece in self.pieces
+        )
+        description += self._world_boss_text(now)
+        embed = discord.Embed(
+            title=self.title,
+            description=description + "\n" + random.choice(quotes),
+            color=0x00ff99
+        )
+        if banner_url:
+            embed.set_image(url=banner_url)
+        embed.add_field(name="Support the App", value=SUPPORT_LINK, inline=False)
+        self._tick, self._embed = (now, banner_url), embed
+        return embed
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_summary_template(schedule, when):
+    return SummaryTemplate(schedule, when)
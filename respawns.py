@@ -0,0 +1,172 @@
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from timerwheel import TimerWheel
+
+# Field bosses and their respawn after a kill, as (respawn, window) in
+# minutes: the boss appears between ``respawn`` and ``respawn + window``
+# minutes after it died. Taken from the community timers; a server on
+# different timers can override or extend them in field_bosses.json.
+FIELD_BOSSES = {
+    "Venatus": (600, 0),
+    "Viorent": (600, 0),
+    "Ego": (1260, 0),
+    "Lady Dalia": (1080, 0),
+    "Livera": (1440, 0),
+    "Araneo": (1440, 0),
+    "Undomiel": (1440, 0),
+    "General Aquleus": (1740, 0),
+    "Amentis": (1740, 0),
+    "Baron Braudmore": (1920, 0),
+    "Gareth": (1920, 0),
+    "Shuliar": (2100, 0),
+    "Larba": (2100, 0),
+    "Catena": (2100, 0),
+    "Titore": (2220, 0),
+    "Wannitas": (2880, 0),
+    "Metus": (2880, 0),
+    "Duplican": (2880, 0),
+}
+
+# Alerts go out this many minutes before the window opens, and when it opens
+ALERT_LEADS = (10, 0)
+
+# A kill stays listed in /l9 respawns this long after its window closes
+LISTED_AFTER = 30
+
+# Alerts that came due this many minutes ago, or less (while the bot was
+# down, or for a kill logged late), are still sent, like a misfired reminder
+ALERT_GRACE = 10
+
+
+def load_field_bosses(path):
+    """FIELD_BOSSES, with entries from ``path`` added or replaced.
+
+    The file maps boss names to ``{"respawn_minutes": 600, "window_minutes": 0}``.
+    """
+    bosses = dict(FIELD_BOSSES)
+    if not os.path.exists(path):
+        return bosses
+    with open(path, 'r') as f:
+        data = json.load(f)
+    for name, entry in data.items():
+        bosses[name] = (int(entry['respawn_minutes']), int(entry.get('window_minutes', 0)))
+    return bosses
+
+
+def to_tick(when):
+    """Minutes since the epoch; the tracker's unit of time."""
+    return int(when.timestamp() // 60)
+
+
+def from_tick(tick, tz):
+    return datetime.fromtimestamp(tick * 60, tz)
+
+
+_TIME = re.compile(r'^\s*(\d{1,2})(?::(\d{2}))?\s*([ap]\.?m\.?)?\s*$', re.IGNORECASE)
+
+
+def parse_kill_time(text, now):
+    """The last time at or before ``now`` matching ``text`` ("14:05", "2:05 PM", "2pm")."""
+    match = _TIME.match(text)
+    if not match:
+        raise ValueError(f"could not read {text!r} as a time")
+    hour, minute, suffix = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if suffix:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"{text!r} is not a valid time")
+        hour = hour % 12 + (12 if suffix[0].lower() == 'p' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"{text!r} is not a valid time")
+    killed_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if killed_at > now:
+        killed_at -= timedelta(days=1)
+    return killed_at
+
+
+class RespawnTracker:
+    """Logged field boss kills and the alerts they are due.
+
+    Every kill puts one timer per alert lead, plus one that drops the kill
+    once its window has passed, on a ``TimerWheel``, so logging or replacing
+    a kill is O(1) whatever the number of guilds and bosses. Only the kill
+    itself (guild, boss, minute) is stored; the timers are rebuilt from the
+    respawn table on start.
+
+    Times are ticks from ``to_tick``. Timer keys are ``(guild_id, boss, lead)``,
+    with lead None for the expiry timer. An alert that came due no more than
+    ``grace`` ticks ago fires on the next tick.
+    """
+
+    def __init__(self, bosses, now, leads=ALERT_LEADS, grace=ALERT_GRACE):
+        self.bosses = bosses
+        self.leads = leads
+        self.grace = grace
+        self.wheel = TimerWheel(now)
+        # Guild id -> {boss: tick it was killed}
+        self.kills = {}
+
+    def window(self, boss, killed_at):
+        """(first, last) tick the boss can spawn after a kill at ``killed_at``."""
+        respawn, window = self.bosses[boss]
+        return killed_at + respawn, killed_at + respawn + window
+
+    def record(self, guild_id, boss, killed_at):
+        """Log a kill, replacing the boss's previous one; returns False if its window is long past."""
+        self.forget(guild_id, boss)
+        opens, closes = self.window(boss, killed_at)
+        if closes + LISTED_AFTER <= self.wheel.now:
+            return False
+        self.kills.setdefault(guild_id, {})[boss] = killed_at
+        for lead in self.leads:
+            # Alerts overdue by more than the grace are not sent at all
+            if opens - lead + self.grace > self.wheel.now:
+                self.wheel.schedule((guild_id, boss, lead), opens - lead, killed_at)
+        self.wheel.schedule((guild_id, boss, None), closes + LISTED_AFTER, killed_at)
+        return True
+
+    def forget(self, guild_id, boss):
+        kills = self.kills.get(guild_id)
+        if not kills or kills.pop(boss, None) is None:
+            return False
+        if not kills:
+            del self.kills[guild_id]
+        for lead in self.leads:
+            self.wheel.cancel((guild_id, boss, lead))
+        self.wheel.cancel((guild_id, boss, None))
+        return True
+
+    def forget_guild(self, guild_id):
+        """Drop all of a guild's kills; returns the bosses they were of."""
+        bosses = list(self.kills.get(guild_id, ()))
+        for boss in bosses:
+            self.forget(guild_id, boss)
+        return bosses
+
+    def advance(self, now):
+        """Move to tick ``now``.
+
+        Returns ``(alerts, expired)``: the ``(guild_id, boss, lead, killed_at)``
+        alerts now due, and the ``(guild_id, boss)`` kills dropped.
+        """
+        alerts = []
+        expired = []
+        for (guild_id, boss, lead), _, killed_at in self.wheel.advance(now):
+            if lead is None:
+                self.kills[guild_id].pop(boss)
+                if not self.kills[guild_id]:
+                    del self.kills[guild_id]
+                expired.append((guild_id, boss))
+            else:
+                alerts.append((guild_id, boss, lead, killed_at))
+        return alerts, expired
+
+    def upcoming(self, guild_id):
+        """``(opens, closes, boss, killed_at)`` for a guild's logged kills, soonest spawn first."""
+        return sorted((*self.window(boss, killed_at), boss, killed_at)
+                      for boss, killed_at in self.kills.get(guild_id, {}).items())
+
+    def __len__(self):
+        return sum(len(kills) for kills in self.kills.values())
@@ -0,0 +1,166 @@
+"""Replay the reminder schedule in virtual time.
+
+Builds the same cron jobs the bot would (through ``ReminderJobs``), walks
+their fire times from ``--start`` for ``--days`` days without waiting for the
+clock, and prints every reminder that would be posted with its rendered text.
+Use it to check a schedule edit before rolling it out::
+
+    python simulator.py --days 365 --quiet
+    python simulator.py --events proposed_events.json --start 2026-10-24T19:00 --days 2
+    python simulator.py --db l9alerts.db --guild 1072094900776087572 --days 14
+"""
+import argparse
+import heapq
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+import discord
+from apscheduler.jobstores.base import JobLookupError
+
+from clock import SystemClock
+from jobs import LEAD_TIMES, ReminderJobs, minute_of_week
+from occurrences import week_offsets
+from reminders import TIMEZONE, compile_summary_template, schedule_key
+from storage import Store, read_json_events
+
+
+class RecordedJob:
+    __slots__ = ('id', 'func', 'trigger', 'args', 'misfire_grace_time')
+
+    def __init__(self, id, func, trigger, args, misfire_grace_time):
+        self.id = id
+        self.func = func
+        self.trigger = trigger
+        self.args = args
+        self.misfire_grace_time = misfire_grace_time
+
+
+class RecordingScheduler:
+    """Stands in for APScheduler under ReminderJobs: keeps the jobs, never runs them."""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, func, trigger, args=None, id=None, misfire_grace_time=None, **kwargs):
+        self.jobs[id] = RecordedJob(id, func, trigger, tuple(args or ()), misfire_grace_time)
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def get_jobs(self):
+        return list(self.jobs.values())
+
+    def remove_job(self, job_id):
+        try:
+            del self.jobs[job_id]
+        except KeyError:
+            raise JobLookupError(job_id)
+
+
+class Firing(NamedTuple):
+    fire_time: datetime
+    event_time: datetime
+    when: str
+    guild_ids: tuple
+    # Names of the events starting at event_time on these guilds' schedule
+    events: tuple
+    embed: Optional[discord.Embed]
+
+
+def simulate(guild_events, start, end, render=True):
+    """Every reminder due in ``[start, end)`` for ``guild_events`` (guild id -> events), in time order.
+
+    Yields one ``Firing`` per job run and group of guilds sharing a schedule,
+    rendered as ``fire_reminder_slot`` would render it unless ``render`` is false.
+    """
+    scheduler = RecordingScheduler()
+    reminder_jobs = ReminderJobs(scheduler, None, TIMEZONE)
+    keys = {}
+    names_at = {}
+    for guild_id, events_data in guild_events.items():
+        reminder_jobs.update_guild(guild_id, events_data)
+        key = keys[guild_id] = schedule_key(events_data)
+        if key not in names_at:
+            names = names_at[key] = defaultdict(list)
+            for event in events_data:
+                for offset in week_offsets(event):
+                    names[offset // 60].append(event.name)
+
+    pending = []
+    for job in scheduler.get_jobs():
+        fire_time = job.trigger.get_next_fire_time(None, start)
+        if fire_time is not None and fire_time < end:
+            heapq.heappush(pending, (fire_time, job.id, job))
+    while pending:
+        fire_time, _, job = heapq.heappop(pending)
+        hour, minute, lead = job.args
+        scheduled_at = fire_time.astimezone(TIMEZONE)
+        event_time = scheduled_at + timedelta(minutes=lead)
+        groups = defaultdict(list)
+        for guild_id in sorted(reminder_jobs.recipients(event_time)):
+            groups[keys[guild_id]].append(guild_id)
+        when = LEAD_TIMES[lead]
+        for key, guild_ids in groups.items():
+            embed = compile_summary_template(key, when).render(scheduled_at) if render else None
+            yield Firing(scheduled_at, event_time, when, tuple(guild_ids),
+                         tuple(names_at[key][minute_of_week(event_time)]), embed)
+        next_time = job.trigger.get_next_fire_time(fire_time, fire_time + timedelta(seconds=1))
+        if next_time is not None and next_time < end:
+            heapq.heappush(pending, (next_time, job.id, job))
+
+
+def load_guild_events(db_path=None, events_file=None):
+    # Imported here so the simulator's own import stays free of the bot module
+    from bot import events as default_events
+    if events_file:
+        return read_json_events(events_file, 0)
+    if db_path:
+        store = Store(db_path)
+        try:
+            guild_events = store.load_events()
+            guild_ids = set(store.load_configs()) | set(guild_events)
+        finally:
+            store.close()
+        return {guild_id: guild_events.get(guild_id, default_events) for guild_id in guild_ids}
+    return {0: default_events}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='simulate every guild in this SQLite store')
+    parser.add_argument('--events', help='simulate an events JSON file (a list, or guild id -> list)')
+    parser.add_argument('--guild', type=int, action='append', help='only these guild ids')
+    parser.add_argument('--start', help='ISO date/time in GMT+8 (default: now)')
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--quiet', action='store_true', help='one line per reminder, without the rendered text')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the random quote in each reminder')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    guild_events = load_guild_events(args.db, args.events)
+    if args.guild:
+        guild_events = {guild_id: e for guild_id, e in guild_events.items() if guild_id in args.guild}
+    if args.start:
+        start = datetime.fromisoformat(args.start)
+        start = TIMEZONE.localize(start) if start.tzinfo is None else start.astimezone(TIMEZONE)
+    else:
+        start = SystemClock(TIMEZONE).now()
+    end = start + timedelta(days=args.days)
+
+    firings = deliveries = 0
+    for firing in simulate(guild_events, start, end, render=not args.quiet):
+        firings += 1
+        deliveries += len(firing.guild_ids)
+        print(f"{firing.fire_time:%a %Y-%m-%d %H:%M}  {firing.when:<13}  {', '.join(firing.events)} "
+              f"at {firing.event_time:%a %H:%M}  ({len(firing.guild_ids)} guilds)")
+        if firing.embed is not None:
+            for line in firing.embed.description.splitlines():
+                print(f'    {line}')
+    print(f'{firings} reminder runs, {deliveries} guild reminders between '
+          f'{start:%Y-%m-%d %H:%M} and {end:%Y-%m-%d %H:%M} GMT+8')
+
+
+if __name__ == '__main__':
+    main()
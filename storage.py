@@ -0,0 +1,354 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from occurrences import Event
+
+# Schema for the per-guild state. Config is a small JSON document per guild so
+# new settings do not need a migration; events are one row per schedule entry
+# so an edit touches exactly one row.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guild_config (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS guild_events (
+    guild_id INTEGER NOT NULL,
+    idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    minute INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, idx)
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    key TEXT PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    lead INTEGER NOT NULL,
+    event_at REAL NOT NULL,
+    deadline REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt REAL NOT NULL,
+    state TEXT NOT NULL,
+    boss TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_deadline ON outbox (deadline);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    lead INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, event, lead, user_id)
+);
+CREATE TABLE IF NOT EXISTS dm_channels (
+    user_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kills (
+    guild_id INTEGER NOT NULL,
+    boss TEXT NOT NULL,
+    killed_at INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, boss)
+);
+CREATE TABLE IF NOT EXISTS banners (
+    digest TEXT PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    url TEXT NOT NULL
+);
+"""
+
+_STOP = object()
+
+# A batch that fails with an operational error (the file locked past
+# busy_timeout, a full disk) is retried this many times, with doubling delays,
+# before its writes are applied one at a time
+WRITE_RETRIES = 3
+RETRY_DELAY = 0.1
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # WAL keeps readers unblocked while the writer commits, and a commit is
+    # atomic: a restart mid-write leaves the previous state intact.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # The store's writer thread and the job store share the file
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class Store:
+    """SQLite store for guild config and events.
+
+    Reads happen on the calling thread (once, at startup). Writes are queued
+    and applied by a single writer thread, so callers on the event loop never
+    block on disk I/O. Writes that arrive within ``batch_window`` seconds of
+    each other are committed in one transaction. The statements of one call,
+    such as ``save_events`` replacing a guild's schedule, always commit together.
+
+    A write that cannot be committed is logged with its row and kept in
+    ``failed``, and the next ``flush`` returns False.
+    """
+
+    def __init__(self, path, batch_window=0.05, max_batch=500):
+        self.path = path
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        if 'boss' not in {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}:
+            # Outbox tables from before respawn alerts were sent through it
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN boss TEXT")
+        self._conn.commit()
+        self._queue = queue.Queue()
+        # (sql, params, error) of recent writes that could not be committed
+        self.failed = deque(maxlen=100)
+        self.failure_count = 0
+        self._failures_seen = 0
+        self._writer = threading.Thread(target=self._write_loop, name="store-writer", daemon=True)
+        self._writer.start()
+
+    # -- reads -------------------------------------------------------------
+
+    def get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def load_configs(self):
+        rows = self._conn.execute("SELECT guild_id, data FROM guild_config")
+        return {guild_id: json.loads(data) for guild_id, data in rows}
+
+    def load_events(self):
+        guild_events = {}
+        # Guilds with the same entry share one Event
+        shared = {}
+        rows = self._conn.execute(
+            "SELECT guild_id, name, day, hour, minute FROM guild_events ORDER BY guild_id, idx"
+        )
+        for guild_id, *entry in rows:
+            event = shared.get(tuple(entry))
+            if event is None:
+                event = shared[tuple(entry)] = Event(*entry)
+            guild_events.setdefault(guild_id, []).append(event)
+        return guild_events
+
+    def load_outbox(self, since):
+        """Outbox rows whose deadline is at or after ``since``."""
+        return self._conn.execute(
+            "SELECT key, guild_id, lead, event_at, deadline, attempts, next_attempt, state, boss FROM outbox "
+            "WHERE deadline >= ?", (since,)
+        ).fetchall()
+
+    def load_subscriptions(self):
+        return self._conn.execute("SELECT guild_id, user_id, event, lead FROM subscriptions").fetchall()
+
+    def load_dm_channels(self):
+        return dict(self._conn.execute("SELECT user_id, channel_id FROM dm_channels"))
+
+    def load_kills(self):
+        return self._conn.execute("SELECT guild_id, boss, killed_at FROM kills").fetchall()
+
+    def load_banners(self):
+        return self._conn.execute("SELECT digest, channel_id, message_id, url FROM banners").fetchall()
+
+    # -- writes (queued) ---------------------------------------------------
+
+    def set_meta(self, key, value):
+        self._submit("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def save_config(self, guild_id, guild_config):
+        # Serialised here so later mutations of the dict do not leak into the write
+        self._submit(
+            "INSERT OR REPLACE INTO guild_config (guild_id, data) VALUES (?, ?)",
+            (guild_id, json.dumps(guild_config)),
+        )
+
+    def save_event(self, guild_id, idx, event):
+        self._submit(*_event_row(guild_id, idx, event))
+
+    def save_events(self, guild_id, events_data):
+        # One unit: a crash or a batch cut never leaves a guild with part of its schedule
+        self._submit_unit(
+            [("DELETE FROM guild_events WHERE guild_id = ?", (guild_id,))]
+            + [_event_row(guild_id, idx, event) for idx, event in enumerate(events_data)]
+        )
+
+    def save_outbox(self, key, guild_id, lead, event_at, deadline, attempts, next_attempt, state, boss=None):
+        self._submit(
+            "INSERT OR REPLACE INTO outbox (key, guild_id, lead, event_at, deadline, attempts, next_attempt, state, boss) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, guild_id, lead, event_at, deadline, attempts, next_attempt, state, boss),
+        )
+
+    def set_outbox_state(self, key, state):
+        self._submit("UPDATE outbox SET state = ? WHERE key = ?", (state, key))
+
+    def prune_outbox(self, before):
+        self._submit("DELETE FROM outbox WHERE deadline < ?", (before,))
+
+    def add_subscription(self, guild_id, user_id, event, lead):
+        self._submit(
+            "INSERT OR IGNORE INTO subscriptions (guild_id, user_id, event, lead) VALUES (?, ?, ?, ?)",
+            (guild_id, user_id, event, lead),
+        )
+
+    def remove_subscription(self, guild_id, user_id, event, lead):
+        self._submit(
+            "DELETE FROM subscriptions WHERE guild_id = ? AND user_id = ? AND event = ? AND lead = ?",
+            (guild_id, user_id, event, lead),
+        )
+
+    def save_dm_channel(self, user_id, channel_id):
+        self._submit("INSERT OR REPLACE INTO dm_channels (user_id, channel_id) VALUES (?, ?)", (user_id, channel_id))
+
+    def save_kill(self, guild_id, boss, killed_at):
+        self._submit(
+            "INSERT OR REPLACE INTO kills (guild_id, boss, killed_at) VALUES (?, ?, ?)", (guild_id, boss, killed_at)
+        )
+
+    def remove_kill(self, guild_id, boss):
+        self._submit("DELETE FROM kills WHERE guild_id = ? AND boss = ?", (guild_id, boss))
+
+    def save_banner(self, digest, channel_id, message_id, url):
+        self._submit(
+            "INSERT OR REPLACE INTO banners (digest, channel_id, message_id, url) VALUES (?, ?, ?, ?)",
+            (digest, channel_id, message_id, url),
+        )
+
+    def remove_banner(self, digest):
+        self._submit("DELETE FROM banners WHERE digest = ?", (digest,))
+
+    def _submit(self, sql, params):
+        self._queue.put(((sql, params),))
+
+    def _submit_unit(self, statements):
+        """Queue ``(sql, params)`` statements that are committed together or not at all."""
+        self._queue.put(tuple(statements))
+
+    def flush(self, timeout=None):
+        """Block until every write queued so far is applied.
+
+        Returns False on timeout, or if a write queued since the last flush
+        could not be committed.
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            return False
+        failures = self.failure_count
+        ok = failures == self._failures_seen
+        self._failures_seen = failures
+        return ok
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._conn.close()
+
+    def _write_loop(self):
+        conn = connect(self.path)
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Group writes that arrive close together into one transaction;
+            # ``max_batch`` counts units, so a unit is never split
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get(timeout=self.batch_window))
+                except queue.Empty:
+                    break
+            writes = []
+            waiters = []
+            for item in batch:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    writes.append(item)
+            if writes:
+                self._apply(conn, writes)
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _apply(self, conn, writes):
+        error = None
+        for attempt in range(WRITE_RETRIES):
+            try:
+                with conn:
+                    for unit in writes:
+                        for statement in unit:
+                            conn.execute(*statement)
+                return
+            except sqlite3.OperationalError as e:
+                # Rolled back; likely transient
+                error = e
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+            except sqlite3.Error as e:
+                error = e
+                break
+        # One bad row must not take the rest of the batch with it
+        print(f'Error writing {len(writes)} writes to {self.path}: {error}; writing them one at a time')
+        for unit in writes:
+            try:
+                with conn:
+                    for statement in unit:
+                        conn.execute(*statement)
+            except sqlite3.Error as e:
+                for sql, params in unit:
+                    self.failed.append((sql, params, e))
+                self.failure_count += 1
+                print(f'Error writing to {self.path}: {e}; dropped {len(unit)} statements, '
+                      f'starting {unit[0][0]!r} {unit[0][1]!r}')
+
+    # -- migration ---------------------------------------------------------
+
+    def import_json(self, config_file, events_file, legacy_guild_id):
+        """Import the pre-SQLite JSON files once, on the first start."""
+        if self.get_meta('json_imported'):
+            return False
+        for guild_id, guild_config in read_json_config(config_file, legacy_guild_id).items():
+            self.save_config(guild_id, guild_config)
+        for guild_id, events_data in read_json_events(events_file, legacy_guild_id).items():
+            self.save_events(guild_id, events_data)
+        self.set_meta('json_imported', 1)
+        self.flush()
+        return True
+
+
+def _event_row(guild_id, idx, event):
+    return (
+        "INSERT OR REPLACE INTO guild_events (guild_id, idx, name, day, hour, minute) VALUES (?, ?, ?, ?, ?, ?)",
+        (guild_id, idx, event.name, event.day, event.hour, event.minute),
+    )
+
+
+def read_json_config(path, legacy_guild_id):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        data = json.load(f)
+    # Single-guild files predate per-guild config
+    if 'reminder_channel_id' in data or 'mention_role_id' in data:
+        return {legacy_guild_id: data}
+    return {int(guild_id): guild_config for guild_id, guild_config in data.items()}
+
+
+def read_json_events(path, legacy_guild_id):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return {legacy_guild_id: [Event.from_dict(e) for e in data]}
+    return {int(guild_id): [Event.from_dict(e) for e in events_data] for guild_id, events_data in data.items()}
@@ -0,0 +1,55 @@
+class SubscriptionIndex:
+    """Players subscribed to DMs for an event, keyed by (guild id, event name, lead).
+
+    Finding who to DM for a firing is one dict lookup per event starting then.
+    ``by_user`` is the reverse index behind /l9 unsubscribe, and
+    ``dm_channels`` caches each user's DM channel id so a DM costs one request
+    instead of two (discord.py only caches the last 128 DM channels).
+    """
+
+    def __init__(self):
+        self.subscribers = {}
+        self.by_user = {}
+        self.dm_channels = {}
+
+    def add(self, guild_id, user_id, event, lead):
+        """Returns False if the user was already subscribed."""
+        users = self.subscribers.setdefault((guild_id, event, lead), set())
+        if user_id in users:
+            return False
+        users.add(user_id)
+        self.by_user.setdefault((guild_id, user_id), set()).add((event, lead))
+        return True
+
+    def remove(self, guild_id, user_id, event, lead):
+        """Returns False if the user was not subscribed."""
+        users = self.subscribers.get((guild_id, event, lead))
+        if not users or user_id not in users:
+            return False
+        users.discard(user_id)
+        if not users:
+            del self.subscribers[(guild_id, event, lead)]
+        subscribed = self.by_user[(guild_id, user_id)]
+        subscribed.discard((event, lead))
+        if not subscribed:
+            del self.by_user[(guild_id, user_id)]
+        return True
+
+    def remove_user(self, guild_id, user_id):
+        """Drop every subscription of a user in a guild; returns the (event, lead) pairs removed."""
+        removed = sorted(self.by_user.get((guild_id, user_id), ()))
+        for event, lead in removed:
+            self.remove(guild_id, user_id, event, lead)
+        return removed
+
+    def recipients(self, guild_id, event, lead):
+        return self.subscribers.get((guild_id, event, lead), ())
+
+    def for_user(self, guild_id, user_id):
+        return self.by_user.get((guild_id, user_id), set())
+
+    def guilds(self):
+        return {guild_id for guild_id, _, _ in self.subscribers}
+
+    def __len__(self):
+        return sum(len(users) for users in self.subscribers.values())
@@ -0,0 +1,11 @@
+import pytest
+
+import bot as app
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # Keep the repository's legacy JSON files out of the store
+    monkeypatch.setattr(app, 'CONFIG_FILE', str(tmp_path / 'bot_config.json'))
+    monkeypatch.setattr(app, 'EVENTS_FILE', str(tmp_path / 'events_config.json'))
+    return str(tmp_path / 'l9.db')
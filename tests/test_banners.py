@@ -0,0 +1,138 @@
+import asyncio
+
+import discord
+import pytest
+
+from banners import BannerCache
+from fakediscord import FakeResponse
+from storage import Store
+
+NOW = 1_800_000_000
+DAY = 86400
+
+
+class FakeCDN:
+    """Asset channel stand-in: signs every URL to expire ``lifetime`` seconds after ``now``."""
+
+    def __init__(self, lifetime=DAY):
+        self.now = NOW
+        self.lifetime = lifetime
+        self.uploads = []
+        self.refreshes = []
+        # Message ids deleted from the channel, and those whose refresh is answered with None
+        self.deleted = set()
+        self.edited = set()
+
+    def sign(self, message_id):
+        return f'https://cdn.discordapp.com/attachments/1/{message_id}/banner.png?ex={self.now + self.lifetime:x}'
+
+    async def upload(self, name, path):
+        self.uploads.append(name)
+        message_id = len(self.uploads)
+        return 1, message_id, self.sign(message_id)
+
+    async def refresh(self, channel_id, message_id):
+        self.refreshes.append(message_id)
+        if message_id in self.deleted:
+            raise discord.NotFound(FakeResponse(404, 'Not Found'), 'Unknown Message')
+        return None if message_id in self.edited else self.sign(message_id)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Store(str(tmp_path / 'l9.db'))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def directory(tmp_path):
+    directory = tmp_path / 'banners'
+    directory.mkdir()
+    (directory / 'venatus.png').write_bytes(b'venatus')
+    (directory / 'ego.png').write_bytes(b'ego')
+    return directory
+
+
+def sync(cache, cdn):
+    asyncio.run(cache.sync(cdn.now))
+    cache.store.flush()
+
+
+def test_unchanged_images_are_not_uploaded_again(store, directory):
+    cdn = FakeCDN()
+    cache = BannerCache(store, cdn.upload, cdn.refresh, directory=str(directory))
+    assert cache.load() == 2
+    sync(cache, cdn)
+    assert sorted(cdn.uploads) == ['ego', 'venatus']
+    url = cache.url('venatus')
+    # A restart, and an identical copy under another name, reuse the recorded upload
+    (directory / 'viorent.png').write_bytes(b'venatus')
+    cache = BannerCache(store, cdn.upload, cdn.refresh, directory=str(directory))
+    cache.load()
+    sync(cache, cdn)
+    assert len(cdn.uploads) == 2 and not cdn.refreshes
+    assert cache.url('viorent') == cache.url('venatus') == url
+
+
+def test_urls_are_refreshed_near_expiry(store, directory):
+    cdn = FakeCDN()
+    cache = BannerCache(store, cdn.upload, cdn.refresh, directory=str(directory), margin=3600)
+    cache.load()
+    sync(cache, cdn)
+    old = cache.url('ego')
+    cdn.now += DAY - 3601
+    sync(cache, cdn)
+    assert not cdn.refreshes
+    cdn.now += 2
+    sync(cache, cdn)
+    assert sorted(cdn.refreshes) == [1, 2] and len(cdn.uploads) == 2
+    assert cache.url('ego') != old
+    assert sorted(url for _, _, _, url in store.load_banners()) == sorted([cache.url('ego'), cache.url('venatus')])
+
+
+def test_missing_attachment_is_uploaded_again(store, directory):
+    cdn = FakeCDN()
+    cache = BannerCache(store, cdn.upload, cdn.refresh, directory=str(directory), margin=3600)
+    cache.load()
+    sync(cache, cdn)
+    ego, venatus = (cdn.uploads.index(name) + 1 for name in ('ego', 'venatus'))
+    cdn.deleted.add(ego)
+    cdn.edited.add(venatus)
+    cdn.now += DAY
+    sync(cache, cdn)
+    assert sorted(cdn.uploads[2:]) == ['ego', 'venatus']
+    assert {message_id for _, _, message_id, _ in store.load_banners()} == {3, 4}
+
+
+def test_changed_or_removed_images_drop_their_old_upload(store, directory):
+    cdn = FakeCDN()
+    cache = BannerCache(store, cdn.upload, cdn.refresh, directory=str(directory))
+    cache.load()
+    sync(cache, cdn)
+    (directory / 'venatus.png').write_bytes(b'venatus, redrawn')
+    (directory / 'ego.png').unlink()
+    cache.load()
+    sync(cache, cdn)
+    assert cdn.uploads[2:] == ['venatus']
+    assert cache.url('ego') is None
+    assert len(cache.uploads) == 1 and len(store.load_banners()) == 1
+
+
+def test_expired_url_is_dropped_when_refresh_fails(store, directory):
+    cdn = FakeCDN()
+    cache = BannerCache(store, cdn.upload, cdn.refresh, directory=str(directory), margin=3600)
+    cache.load()
+    sync(cache, cdn)
+
+    async def failing(*args):
+        raise discord.HTTPException(FakeResponse(500, 'Internal Server Error'), 'simulated server error')
+    cache.refresh = failing
+    # Still valid for a while: the old link is kept
+    cdn.now += DAY - 60
+    sync(cache, cdn)
+    assert cache.url('ego') is not None
+    # Expired: better no image than a broken one
+    cdn.now += 60
+    sync(cache, cdn)
+    assert cache.url('ego') is None
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import timedelta
+
+import bot as app
+from clock import VirtualClock
+from countdown import CountdownBoard, render_countdown
+from dispatcher import FanoutDispatcher
+from tests.test_outbox import GUILD_ID, POSTS, SCHEDULED_AT, start_bot, stop_bot
+
+EDITS = 'PATCH /channels/{channel_id}/messages/{message_id}'
+# The schedule key of a one-event schedule, and of the same event an hour later
+SATURDAY = (("Guild Boss", "Saturday", 20, 0),)
+LATER = (("Guild Boss", "Saturday", 21, 0),)
+
+
+def target(guild_id, schedule):
+    return (guild_id, guild_id * 1000 + 1, guild_id * 1000 + 2, schedule)
+
+
+def flush(board, edited):
+    async def edit(guild_id, channel_id, message_id, text):
+        edited.append((guild_id, text))
+    return asyncio.run(board.flush(edit, SCHEDULED_AT))
+
+
+def test_flush_stays_within_budget():
+    board = CountdownBoard(FanoutDispatcher(global_rate=1000), edit_rate=0.05, interval=60)
+    assert board.budget == 3
+    board.refresh([target(guild_id, SATURDAY) for guild_id in range(5)], SCHEDULED_AT)
+    edited = []
+    assert flush(board, edited).delivered == 3
+    assert [guild_id for guild_id, _ in edited] == [0, 1, 2]
+    assert list(board.pending) == [3, 4]
+    # Guilds already showing the text are not queued again
+    board.refresh([target(guild_id, SATURDAY) for guild_id in range(5)], SCHEDULED_AT)
+    assert list(board.pending) == [3, 4]
+    assert flush(board, edited).delivered == 2
+    assert not board.pending
+
+
+def test_queued_edits_coalesce_to_the_newest_text():
+    board = CountdownBoard(FanoutDispatcher(global_rate=1000), edit_rate=0.05, interval=20)
+    board.refresh([target(1, SATURDAY), target(2, SATURDAY)], SCHEDULED_AT)
+    # Guild 1's schedule changes while its edit is still waiting: it keeps its
+    # place in line and is sent only the newest text
+    board.refresh([target(1, LATER), target(2, SATURDAY)], SCHEDULED_AT)
+    edited = []
+    flush(board, edited)
+    assert edited == [(1, render_countdown(LATER, SCHEDULED_AT))]
+    assert list(board.pending) == [2]
+    # Guild 2's message was reposted with the current text meanwhile
+    board.mark_shown(2, render_countdown(SATURDAY, SCHEDULED_AT))
+    assert not board.pending
+
+
+def test_text_changes_only_when_an_event_starts():
+    board = CountdownBoard(FanoutDispatcher(global_rate=1000))
+    board.mark_shown(1, render_countdown(SATURDAY, SCHEDULED_AT))
+    board.refresh([target(1, SATURDAY)], SCHEDULED_AT + timedelta(minutes=15))
+    assert not board.pending
+    board.refresh([target(1, SATURDAY)], SCHEDULED_AT + timedelta(minutes=16))
+    assert list(board.pending) == [1]
+
+
+def test_enabling_twice_keeps_one_countdown_message(db_path):
+    async def run():
+        fake = await start_bot(db_path, VirtualClock(SCHEDULED_AT))
+        await fake.invoke(app.bot, GUILD_ID, 'countdown', {'enabled': True})
+        message_id = app.get_guild_config(GUILD_ID)['countdown_message_id']
+        await fake.invoke(app.bot, GUILD_ID, 'countdown', {'enabled': True})
+        assert app.get_guild_config(GUILD_ID)['countdown_message_id'] == message_id
+        assert fake.requests[POSTS] == 1 and fake.requests[EDITS] == 1
+        await stop_bot()
+    asyncio.run(run())
@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import dispatcher
+from clock import VirtualClock
+from dispatcher import FanoutDispatcher, TokenBucket
+
+
+class FakeMonotonic:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def monotonic(monkeypatch):
+    clock = FakeMonotonic()
+    monkeypatch.setattr(dispatcher.time, 'monotonic', clock)
+    return clock
+
+
+def take_all(bucket):
+    """Acquire until the bucket would have to wait; returns how many tokens that was."""
+    taken = 0
+    while True:
+        bucket._refill()
+        if bucket.tokens < 1:
+            return taken
+        asyncio.run(bucket.acquire())
+        taken += 1
+
+
+def test_bursts_to_capacity_then_refills_at_rate(monotonic):
+    bucket = TokenBucket(rate=5 / 5.0, capacity=5)
+    assert take_all(bucket) == 5
+    monotonic.now += 2.5
+    assert take_all(bucket) == 2
+    # Idle for long, it refills to capacity and no further
+    monotonic.now += 60
+    assert bucket.is_full()
+    assert take_all(bucket) == 5
+
+
+def test_penalize_blocks_until_retry_after(monotonic):
+    bucket = TokenBucket(rate=50, capacity=50)
+    bucket.penalize(2.0)
+    assert take_all(bucket) == 0
+    monotonic.now += 1.9
+    assert take_all(bucket) == 0
+    monotonic.now += 0.2
+    assert take_all(bucket) >= 1
+
+
+def test_penalize_never_adds_tokens(monotonic):
+    bucket = TokenBucket(rate=1, capacity=5)
+    take_all(bucket)
+    bucket.tokens = -10
+    bucket.penalize(1.0)
+    assert bucket.tokens == -10
+
+
+def test_acquire_waits_for_the_next_token():
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await bucket.acquire()
+        return loop.time() - start
+
+    # One token up front, then one every 50ms
+    assert 0.09 <= asyncio.run(run()) < 0.5
+
+
+def test_deadline_and_skew_follow_the_dispatcher_clock():
+    scheduled_at = datetime(2020, 10, 17, 11, 45, tzinfo=timezone.utc)
+    clock = VirtualClock(scheduled_at)
+    fanout = FanoutDispatcher(workers=1, global_rate=1000, clock=clock)
+    sent = []
+
+    async def send(i):
+        sent.append(i)
+        clock.advance(seconds=30)
+
+    sends = [(i, lambda i=i: send(i)) for i in range(4)]
+    result = asyncio.run(fanout.dispatch(sends, scheduled_at, deadline=scheduled_at + timedelta(seconds=45)))
+    # The wall clock is years past the deadline; only the virtual one counts
+    assert sent == [0, 1]
+    assert (result.delivered, result.expired) == (2, 2)
+    assert result.skews == [30, 60]
@@ -0,0 +1,133 @@
+from datetime import datetime
+
+import pytest
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from jobs import ReminderJobs, SQLiteJobStore, job_id
+from occurrences import Event
+from reminders import TIMEZONE
+
+SATURDAY_8PM = Event("Guild Boss", "Saturday", 20, 0)
+SUNDAY_8PM = Event("Guild Boss", "Sunday", 20, 0)
+
+
+def fire(hour, minute, lead):
+    pass
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = BackgroundScheduler(timezone=TIMEZONE)
+    scheduler.start(paused=True)
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+
+@pytest.fixture
+def open_scheduler(tmp_path):
+    """Opens schedulers on one SQLiteJobStore file, as successive runs of the bot would."""
+    schedulers = []
+
+    def open_scheduler():
+        scheduler = BackgroundScheduler(jobstores={'default': SQLiteJobStore(str(tmp_path / 'jobs.db'))},
+                                        timezone=TIMEZONE)
+        scheduler.start(paused=True)
+        schedulers.append(scheduler)
+        return scheduler
+    yield open_scheduler
+    for scheduler in schedulers:
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
+
+
+def next_runs(scheduler):
+    return {job.id: job.next_run_time for job in scheduler.get_jobs()}
+
+
+def test_guilds_share_jobs(scheduler):
+    jobs = ReminderJobs(scheduler, fire, TIMEZONE)
+    jobs.update_guild(1, [SATURDAY_8PM])
+    jobs.update_guild(2, [SATURDAY_8PM, SUNDAY_8PM])
+    assert len(scheduler.get_jobs()) == 2
+    assert jobs.recipients(TIMEZONE.localize(datetime(2026, 10, 17, 20, 0))) == {1, 2}
+    assert jobs.recipients(TIMEZONE.localize(datetime(2026, 10, 18, 20, 0))) == {2}
+
+    jobs.remove_guild(2)
+    trigger = scheduler.get_job(job_id(20 * 60, 0)).trigger
+    assert str(trigger.fields[CronTrigger.FIELD_NAMES.index('day_of_week')]) == '5'
+    jobs.remove_guild(1)
+    assert scheduler.get_jobs() == []
+
+
+def test_edit_only_touches_the_changed_time(scheduler):
+    jobs = ReminderJobs(scheduler, fire, TIMEZONE)
+    jobs.update_guild(1, [SATURDAY_8PM, Event("Garbana Dungeon", "Saturday", 21, 0)])
+    untouched = scheduler.get_job(job_id(21 * 60, 0))
+    jobs.update_guild(1, [SATURDAY_8PM.replace(hour=19), Event("Garbana Dungeon", "Saturday", 21, 0)])
+    assert {job.id for job in scheduler.get_jobs()} == {
+        job_id(minute, lead) for minute in (19 * 60, 21 * 60) for lead in (15, 0)}
+    # The memory job store hands back the same Job until it is replaced
+    assert scheduler.get_job(job_id(21 * 60, 0)) is untouched
+
+
+def test_lead_across_midnight_fires_the_day_before(scheduler):
+    ReminderJobs(scheduler, fire, TIMEZONE).update_guild(1, [Event("Guild Boss", "Monday", 0, 5)])
+    trigger = scheduler.get_job(job_id(5, 15)).trigger
+    saturday = TIMEZONE.localize(datetime(2026, 10, 17, 12, 0))
+    assert trigger.get_next_fire_time(None, saturday) == TIMEZONE.localize(datetime(2026, 10, 18, 23, 50))
+
+
+def test_early_reminder_grace_is_capped_at_its_lead(scheduler):
+    ReminderJobs(scheduler, fire, TIMEZONE, leads={15: '15 min before', 0: 'Start'},
+                 misfire_grace_time=1200).update_guild(1, [SATURDAY_8PM])
+    assert scheduler.get_job(job_id(20 * 60, 15)).misfire_grace_time == 900
+    assert scheduler.get_job(job_id(20 * 60, 0)).misfire_grace_time == 1200
+
+
+def test_jobs_survive_restart(open_scheduler):
+    scheduler = open_scheduler()
+    ReminderJobs(scheduler, fire, TIMEZONE).update_guild(1, [SATURDAY_8PM])
+    before = next_runs(scheduler)
+    assert set(before) == {job_id(20 * 60, 15), job_id(20 * 60, 0)}
+    scheduler.shutdown(wait=False)
+
+    scheduler = open_scheduler()
+    assert next_runs(scheduler) == before
+    job = scheduler.get_job(job_id(20 * 60, 15))
+    assert job.func is fire and tuple(job.args) == (20, 0, 15)
+
+
+def test_prune_removes_jobs_no_guild_needs(open_scheduler):
+    scheduler = open_scheduler()
+    ReminderJobs(scheduler, fire, TIMEZONE).update_guild(1, [SATURDAY_8PM])
+    scheduler.shutdown(wait=False)
+
+    # After a restart with a schedule that moved, the stored 20:00 jobs are stale
+    scheduler = open_scheduler()
+    jobs = ReminderJobs(scheduler, fire, TIMEZONE)
+    jobs.update_guild(1, [SATURDAY_8PM.replace(hour=21)])
+    jobs.prune()
+    assert set(next_runs(scheduler)) == {job_id(21 * 60, 15), job_id(21 * 60, 0)}
+
+
+def test_store_raises_apscheduler_errors(open_scheduler):
+    scheduler = open_scheduler()
+    trigger = CronTrigger(hour=20, timezone=TIMEZONE)
+    scheduler.add_job(fire, trigger, args=[20, 0, 0], id='reminder:2000:0')
+    with pytest.raises(ConflictingIdError):
+        scheduler.add_job(fire, trigger, args=[20, 0, 0], id='reminder:2000:0')
+    with pytest.raises(JobLookupError):
+        scheduler.remove_job('reminder:2100:0')
+
+
+def test_unrestorable_job_is_dropped(open_scheduler):
+    scheduler = open_scheduler()
+    ReminderJobs(scheduler, fire, TIMEZONE).update_guild(1, [SATURDAY_8PM])
+    store = scheduler._lookup_jobstore('default')
+    with store._conn:
+        store._conn.execute("UPDATE apscheduler_jobs SET job_state = ? WHERE id = ?",
+                            (b'not a pickle', job_id(20 * 60, 0)))
+    assert [job.id for job in scheduler.get_jobs()] == [job_id(20 * 60, 15)]
+    assert store.count_jobs() == 1
@@ -0,0 +1,69 @@
+import random
+from datetime import datetime, timedelta
+
+from occurrences import DAYS_MAP, Event, OccurrenceIndex
+from reminders import TIMEZONE
+
+MONDAY = TIMEZONE.localize(datetime(2026, 10, 12))
+
+
+def brute_force(events, now, weeks=7):
+    """Every (time, idx) occurrence from ``now`` on, by walking the weeks day by day."""
+    week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    found = []
+    for day in range(7 * weeks):
+        date = week_start + timedelta(days=day)
+        for idx, event in enumerate(events):
+            if event.day == "Everyday" or DAYS_MAP[event.day] == date.weekday():
+                when = date + timedelta(hours=event.hour, minutes=event.minute)
+                if when >= now:
+                    found.append((when, idx))
+    return sorted(found)
+
+
+def random_events(rng, count):
+    return [Event(f"Event {rng.randrange(5)}", rng.choice(list(DAYS_MAP)), rng.randrange(24), rng.choice([0, 30, 45]))
+            for _ in range(count)]
+
+
+def test_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(200):
+        events = random_events(rng, rng.randrange(1, 8))
+        index = OccurrenceIndex(events)
+        now = MONDAY + timedelta(minutes=rng.randrange(7 * 1440))
+        expected = brute_force(events, now)
+        assert index.upcoming(now, 5) == expected[:5]
+        assert index.within(now, 86400) == [o for o in expected if o[0] <= now + timedelta(days=1)]
+        for name in {event.name for event in events}:
+            first = next(o for o in expected if events[o[1]].name == name)
+            assert index.next_occurrence(name, now) == first
+
+
+def test_starting_at_counts_everyday_events():
+    events = [Event("Guild Boss", "Saturday", 20, 0), Event("World Boss", "Everyday", 20, 0),
+              Event("World Boss", "Everyday", 11, 0)]
+    index = OccurrenceIndex(events)
+    saturday = MONDAY + timedelta(days=5, hours=20)
+    assert sorted(index.starting_at(saturday)) == [0, 1]
+    assert index.starting_at(saturday - timedelta(days=1)) == [1]
+    assert index.starting_at(saturday + timedelta(minutes=1)) == []
+
+
+def test_occurrence_at_now_is_upcoming():
+    index = OccurrenceIndex([Event("Guild Boss", "Monday", 0, 0)])
+    assert index.upcoming(MONDAY, 1) == [(MONDAY, 0)]
+    assert index.next_time(0, MONDAY + timedelta(seconds=1)) == MONDAY + timedelta(days=7)
+
+
+def test_update_reindexes_one_event():
+    events = [Event("Guild Boss", "Saturday", 20, 0), Event("Garbana Dungeon", "Saturday", 20, 0)]
+    index = OccurrenceIndex(events)
+    index.update(0, events[0].replace(day="Sunday", hour=21))
+    saturday = MONDAY + timedelta(days=5, hours=20)
+    assert index.starting_at(saturday) == [1]
+    assert index.starting_at(saturday + timedelta(days=1, hours=1)) == [0]
+    assert index.next_occurrence("Guild Boss", MONDAY) == (saturday + timedelta(days=1, hours=1), 0)
+    # Renaming drops the old name from the by-name lookup
+    index.update(1, events[1].replace(name="Garbana"))
+    assert index.next_occurrence("Garbana Dungeon", MONDAY) is None
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import bot as app
+from clock import VirtualClock
+from dispatcher import FanoutDispatcher
+from fakediscord import FakeDiscord, guild_payload
+from outbox import EXPIRED, SENT
+from reminders import TIMEZONE
+from respawns import to_tick
+
+GUILD_ID = 10
+POSTS = 'POST /channels/{channel_id}/messages'
+# 15 minutes before Saturday's 20:00 events
+SCHEDULED_AT = TIMEZONE.localize(datetime(2026, 10, 17, 19, 45))
+
+
+async def start_bot(db_path, clock, error_rate=0.0):
+    bot = app.create_bot(db_path, dispatcher_=FanoutDispatcher(global_rate=1000), clock_=clock,
+                         guild_ready_timeout=0.01)
+    fake = FakeDiscord(latency=0)
+    await fake.connect(bot, [guild_payload(GUILD_ID)])
+    # Reminders are fired by the tests, not by the wall clock
+    app.scheduler.pause()
+    app.update_guild_config(GUILD_ID, reminder_channel_id=GUILD_ID * 1000 + 1)
+    fake.error_rate = error_rate
+    return fake
+
+
+async def stop_bot():
+    # As if the process exited: the outbox, countdown and respawn loops stop too
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    while tasks:
+        # asyncio.wait_for can swallow a cancel that races its inner wait finishing
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks, timeout=0.1)
+        tasks = [task for task in tasks if not task.done()]
+    app.scheduler.shutdown(wait=False)
+    app.store.close()
+
+
+async def retry_due(clock, seconds=5):
+    """Move past every entry's backoff and let ``Outbox.run`` retry them."""
+    clock.advance(seconds=seconds)
+    app.outbox._wakeup.set()
+    for _ in range(100):
+        if not app.outbox.pending and not app.outbox.in_flight:
+            return
+        await asyncio.sleep(0.01)
+
+
+def lag_sum(when):
+    series = app.DELIVERY_LAG.series.get((when,))
+    return series[-1] if series else 0.0
+
+
+def states(since):
+    app.store.flush()
+    return {row[0]: row[7] for row in app.store.load_outbox(since)}
+
+
+def test_retries_after_server_error(db_path):
+    async def run():
+        clock = VirtualClock(SCHEDULED_AT)
+        fake = await start_bot(db_path, clock, error_rate=1.0)
+        await app.send_daily_summary_reminder(15, [GUILD_ID], SCHEDULED_AT)
+        assert len(app.outbox.pending) == 1
+        assert not app.first_alert_delivered
+        fake.error_rate = 0.0
+        lag_before = lag_sum('15 min before')
+        await retry_due(clock)
+        assert not app.outbox.pending
+        assert fake.requests[POSTS] == 2
+        assert list(states(0).values()) == [SENT]
+        # The retry's lag counts from when the reminder was due
+        assert lag_sum('15 min before') - lag_before == pytest.approx(5.0)
+        await stop_bot()
+    asyncio.run(run())
+
+
+def test_expires_at_deadline(db_path):
+    async def run():
+        clock = VirtualClock(SCHEDULED_AT)
+        fake = await start_bot(db_path, clock, error_rate=1.0)
+        await app.send_daily_summary_reminder(15, [GUILD_ID], SCHEDULED_AT)
+        entry, = app.outbox.pending.values()
+        # A "15 min before" reminder is pointless once the event has started
+        clock.set(SCHEDULED_AT + timedelta(minutes=15, seconds=1))
+        fake.error_rate = 0.0
+        result = await app.outbox.deliver([entry], clock.now())
+        assert (result.delivered, result.failed, result.expired) == (0, 0, 1)
+        assert not result.skews
+        assert fake.requests[POSTS] == 1
+        assert not app.outbox.pending
+        assert states(0) == {entry.key: EXPIRED}
+        await stop_bot()
+    asyncio.run(run())
+
+
+def test_replaced_kill_expires_its_pending_alert(db_path):
+    async def run():
+        clock = VirtualClock(SCHEDULED_AT)
+        fake = await start_bot(db_path, clock, error_rate=1.0)
+        # Venatus respawns 600 minutes after a kill; its "10 minutes before" alert is due next tick
+        app.respawns.record(GUILD_ID, 'Venatus', to_tick(SCHEDULED_AT) - 589)
+        clock.advance(minutes=1)
+        await app.fire_respawn_alerts()
+        entry, = app.outbox.pending.values()
+        # A fresh kill is logged before the failed alert is retried
+        app.respawns.record(GUILD_ID, 'Venatus', to_tick(clock.now()))
+        fake.error_rate = 0.0
+        await retry_due(clock)
+        assert not app.outbox.pending
+        assert entry.key in app.outbox.done
+        assert fake.requests[POSTS] == 1
+        assert states(0) == {entry.key: EXPIRED}
+        await stop_bot()
+    asyncio.run(run())
+
+
+def test_repeated_run_posts_once(db_path):
+    async def run():
+        clock = VirtualClock(SCHEDULED_AT)
+        fake = await start_bot(db_path, clock)
+        await app.send_daily_summary_reminder(15, [GUILD_ID], SCHEDULED_AT)
+        clock.advance(seconds=30)
+        await app.send_daily_summary_reminder(15, [GUILD_ID], SCHEDULED_AT)
+        assert fake.requests[POSTS] == 1
+        assert app.first_alert_delivered
+        await stop_bot()
+    asyncio.run(run())
+
+
+def test_restart_drains_pending_without_duplicates(db_path):
+    async def run():
+        clock = VirtualClock(SCHEDULED_AT)
+        fake = await start_bot(db_path, clock, error_rate=1.0)
+        await app.send_daily_summary_reminder(15, [GUILD_ID], SCHEDULED_AT)
+        await app.send_daily_summary_reminder(0, [GUILD_ID], SCHEDULED_AT + timedelta(minutes=15))
+        assert len(app.outbox.pending) == 2
+        assert fake.requests[POSTS] == 2
+        await stop_bot()
+
+        clock.advance(seconds=5)
+        fake = await start_bot(db_path, clock)
+        assert len(app.outbox.pending) == 2
+        await retry_due(clock)
+        assert fake.requests[POSTS] == 2
+        # The reminder jobs catching up after the restart find both sent
+        await app.send_daily_summary_reminder(15, [GUILD_ID], SCHEDULED_AT)
+        await app.send_daily_summary_reminder(0, [GUILD_ID], SCHEDULED_AT + timedelta(minutes=15))
+        assert fake.requests[POSTS] == 2
+        assert set(states(0).values()) == {SENT}
+        await stop_bot()
+    asyncio.run(run())
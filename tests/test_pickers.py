@@ -0,0 +1,53 @@
+import random
+from types import SimpleNamespace
+
+from pickers import MAX_CHOICES, PickerIndexes, PrefixIndex, word_starts
+
+
+def brute_force(items, query):
+    query = query.strip().casefold()
+    return {item for item in items
+            if any(item[0].casefold()[start:].startswith(query) for start in word_starts(item[0].casefold()))}
+
+
+def test_matches_brute_force():
+    rng = random.Random(5)
+    words = ['boss', 'Boss', 'guild', 'alerts', 'Ratan', 'raid', 'r', 'général', 'ÉVÉNEMENTS']
+    for _ in range(200):
+        items = [(rng.choice(' -_/').join(rng.sample(words, rng.randrange(1, 4))), item_id)
+                 for item_id in range(rng.randrange(1, 40))]
+        index = PrefixIndex(items)
+        word = rng.choice(words)
+        query = word[:rng.randrange(1, len(word) + 1)].upper() + rng.choice(['', ' '])
+        results = index.search(query, limit=len(items))
+        assert len(results) == len(set(results))
+        assert set(results) == brute_force(items, query)
+        assert index.search(query, limit=3) == results[:3]
+
+
+def test_whole_name_matches_come_first():
+    index = PrefixIndex([('guild-boss-alerts', 1), ('Boss Hunters', 2), ('bossing', 3)])
+    assert index.search('boss') == [('Boss Hunters', 2), ('guild-boss-alerts', 1), ('bossing', 3)]
+    assert index.search('hunt') == [('Boss Hunters', 2)]
+    assert index.search('oss') == []
+
+
+def test_empty_query_returns_the_first_items_in_order():
+    items = [(f'channel-{i}', i) for i in range(40)]
+    index = PrefixIndex(items)
+    assert index.search('') == items[:MAX_CHOICES]
+    assert index.search('  ', limit=2) == items[:2]
+
+
+def guild(guild_id, channels):
+    return SimpleNamespace(id=guild_id, text_channels=[SimpleNamespace(name=name, id=i) for i, name in enumerate(channels)])
+
+
+def test_indexes_are_cached_until_invalidated():
+    indexes = PickerIndexes()
+    index = indexes.channel_index(guild(1, ['general']))
+    assert indexes.channel_index(guild(1, ['general', 'alerts'])) is index
+    indexes.invalidate_channels(1)
+    assert indexes.channel_index(guild(1, ['general', 'alerts'])).search('al') == [('alerts', 1)]
+    indexes.forget(1)
+    assert 1 not in indexes.channels
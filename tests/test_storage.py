@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+import storage
+from occurrences import Event
+from storage import Store
+
+GUILD_BOSS = Event("Guild Boss", "Saturday", 20, 0)
+WORLD_BOSS = Event("World Boss: Ratan, Parto, Nedra", "Everyday", 11, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Store(str(tmp_path / 'l9.db'))
+    yield store
+    store.close()
+
+
+def test_writes_are_visible_after_flush(store):
+    for guild_id in range(50):
+        store.save_config(guild_id, {'reminder_channel_id': guild_id * 1000 + 1})
+    store.save_events(7, [GUILD_BOSS, WORLD_BOSS])
+    assert store.flush()
+    assert len(store.load_configs()) == 50
+    assert [e.name for e in store.load_events()[7]] == [GUILD_BOSS.name, WORLD_BOSS.name]
+
+
+def test_schedule_replacement_is_never_split(tmp_path):
+    # Batches are cut at max_batch units; a replaced schedule is one unit
+    store = Store(str(tmp_path / 'l9.db'), max_batch=2)
+    store.save_events(1, [GUILD_BOSS.replace(hour=hour) for hour in range(10)])
+    assert store.flush()
+    assert [e.hour for e in store.load_events()[1]] == list(range(10))
+    store.close()
+
+
+def test_failed_replacement_keeps_the_old_schedule(store):
+    store.save_events(1, [GUILD_BOSS, WORLD_BOSS])
+    store.save_config(2, {'mention_role_id': 5})
+    assert store.flush()
+    # hour is NOT NULL: the second row fails, so the whole replacement is rolled back
+    store.save_events(1, [GUILD_BOSS.replace(hour=21), GUILD_BOSS.replace(hour=None)])
+    store.save_config(3, {'mention_role_id': 6})
+    assert not store.flush()
+    assert [e.hour for e in store.load_events()[1]] == [20, 11]
+    # The rest of the batch still commits, and the failure is reported once
+    assert set(store.load_configs()) == {2, 3}
+    assert len(store.failed) == 3
+    assert store.flush()
+
+
+class FlakyConnection:
+    """A connection whose writer-thread executes fail with "database is locked" ``failures`` times."""
+
+    def __init__(self, conn, failures):
+        self.conn = conn
+        self.failures = failures
+
+    def execute(self, *args):
+        if self.failures and threading.current_thread().name == 'store-writer':
+            self.failures[0] -= 1
+            if self.failures[0] >= 0:
+                raise sqlite3.OperationalError('database is locked')
+        return self.conn.execute(*args)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self.conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def test_locked_batch_is_retried(tmp_path, monkeypatch):
+    failures = [2]
+    connect = storage.connect
+    monkeypatch.setattr(storage, 'connect', lambda path: FlakyConnection(connect(path), failures))
+    monkeypatch.setattr(storage, 'RETRY_DELAY', 0)
+    store = Store(str(tmp_path / 'l9.db'))
+    store.save_events(1, [GUILD_BOSS])
+    store.save_kill(1, 'Venatus', 100)
+    assert store.flush()
+    assert failures[0] < 0
+    assert not store.failed
+    assert store.load_kills() == [(1, 'Venatus', 100)]
+    store.close()
+
+
+def test_import_json_single_guild_files(store, tmp_path):
+    config_file = tmp_path / 'bot_config.json'
+    events_file = tmp_path / 'events_config.json'
+    config_file.write_text(json.dumps({'reminder_channel_id': 42}))
+    events_file.write_text(json.dumps([{'name': 'Guild Boss', 'day': 'Saturday', 'hour': 20, 'minute': 0}]))
+    assert store.import_json(str(config_file), str(events_file), 99)
+    assert store.load_configs() == {99: {'reminder_channel_id': 42}}
+    assert [(e.name, e.hour) for e in store.load_events()[99]] == [('Guild Boss', 20)]
+    # Only ever imported once, even if the files change
+    config_file.write_text(json.dumps({'1': {'reminder_channel_id': 7}}))
+    assert not store.import_json(str(config_file), str(events_file), 99)
+    assert store.load_configs() == {99: {'reminder_channel_id': 42}}
+
+
+def test_import_json_per_guild_files(store, tmp_path):
+    config_file = tmp_path / 'bot_config.json'
+    config_file.write_text(json.dumps({'1': {'reminder_channel_id': 7}, '2': {'mention_role_id': 8}}))
+    assert store.import_json(str(config_file), str(tmp_path / 'missing.json'), 99)
+    assert store.load_configs() == {1: {'reminder_channel_id': 7}, 2: {'mention_role_id': 8}}
+    assert store.load_events() == {}
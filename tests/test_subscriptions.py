@@ -0,0 +1,37 @@
+import random
+
+from subscriptions import SubscriptionIndex
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    index = SubscriptionIndex()
+    subscribed = set()
+    for _ in range(2000):
+        guild_id, user_id, event, lead = rng.randrange(3), rng.randrange(10), rng.choice('ABC'), rng.choice([0, 15])
+        op = rng.random()
+        if op < 0.5:
+            assert index.add(guild_id, user_id, event, lead) == ((guild_id, user_id, event, lead) not in subscribed)
+            subscribed.add((guild_id, user_id, event, lead))
+        elif op < 0.9:
+            assert index.remove(guild_id, user_id, event, lead) == ((guild_id, user_id, event, lead) in subscribed)
+            subscribed.discard((guild_id, user_id, event, lead))
+        else:
+            removed = index.remove_user(guild_id, user_id)
+            assert removed == sorted((e, m) for g, u, e, m in subscribed if (g, u) == (guild_id, user_id))
+            subscribed -= {(guild_id, user_id, e, m) for e, m in removed}
+        assert len(index) == len(subscribed)
+        assert set(index.recipients(guild_id, event, lead)) == {
+            u for g, u, e, m in subscribed if (g, e, m) == (guild_id, event, lead)}
+        assert index.for_user(guild_id, user_id) == {(e, m) for g, u, e, m in subscribed if (g, u) == (guild_id, user_id)}
+        assert index.guilds() == {g for g, _, _, _ in subscribed}
+
+
+def test_empty_entries_are_dropped():
+    index = SubscriptionIndex()
+    index.add(1, 100, 'Guild Boss', 15)
+    index.add(1, 100, 'Guild Boss', 0)
+    index.remove(1, 100, 'Guild Boss', 15)
+    assert index.remove_user(1, 100) == [('Guild Boss', 0)]
+    assert index.subscribers == {} and index.by_user == {}
+    assert index.recipients(1, 'Guild Boss', 0) == ()
@@ -0,0 +1,36 @@
+import asyncio
+
+import bot as app
+from clock import VirtualClock
+from tests.test_outbox import SCHEDULED_AT, start_bot, stop_bot
+
+SYNC = 'PUT /applications/{application_id}/commands'
+LEGACY_SYNC = 'PUT /applications/{application_id}/guilds/{guild_id}/commands'
+
+
+def start_and_stop(db_path):
+    """One run of the bot; returns the requests it made."""
+    async def run():
+        fake = await start_bot(db_path, VirtualClock(SCHEDULED_AT))
+        await stop_bot()
+        return fake.requests
+    return asyncio.run(run())
+
+
+def test_sync_is_skipped_on_an_unchanged_tree(db_path, monkeypatch):
+    monkeypatch.delenv('L9_FORCE_SYNC', raising=False)
+
+    first = start_and_stop(db_path)
+    assert first[SYNC] == 1 and first[LEGACY_SYNC] == 1
+    second = start_and_stop(db_path)
+    assert second[SYNC] == 0 and second[LEGACY_SYNC] == 0
+
+
+def test_changed_tree_is_synced(db_path, monkeypatch):
+    monkeypatch.delenv('L9_FORCE_SYNC', raising=False)
+
+    start_and_stop(db_path)
+    # As if a command had been edited since the last sync
+    monkeypatch.setattr(app, 'command_tree_hash', lambda: 'changed')
+    assert start_and_stop(db_path)[SYNC] == 1
+    assert start_and_stop(db_path)[SYNC] == 0
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from respawns import RespawnTracker
+from timerwheel import TimerWheel
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_brute_force(seed):
+    # Random schedules, cancels and advances, checked against a plain dict of
+    # key -> tick it is due; delays span every level of the wheel
+    rng = random.Random(seed)
+    for _ in range(30):
+        now = rng.randrange(10 ** 7)
+        wheel = TimerWheel(now)
+        due = {}
+        for _ in range(300):
+            op = rng.random()
+            if op < 0.5:
+                key = rng.randrange(200)
+                expires = now + rng.choice([rng.randrange(-3, 70), rng.randrange(5000), rng.randrange(300000)])
+                wheel.schedule(key, expires)
+                due[key] = max(expires, now + 1)
+            elif op < 0.6:
+                key = rng.randrange(200)
+                assert wheel.cancel(key) == (key in due)
+                due.pop(key, None)
+            else:
+                to = now + rng.choice([1, rng.randrange(100), rng.randrange(20000)])
+                fired = {key for key, _, _ in wheel.advance(to)}
+                assert fired == {key for key, tick in due.items() if tick <= to}
+                for key in fired:
+                    del due[key]
+                now = to
+            assert len(wheel) == len(due)
+
+
+def test_fired_timers_keep_their_expiry_and_value():
+    wheel = TimerWheel(100)
+    wheel.schedule('late', 90, 'a')
+    wheel.schedule('far', 100 + 64 ** 2 + 5, 'b')
+    assert wheel.advance(101) == [('late', 90, 'a')]
+    assert wheel.advance(100 + 64 ** 2 + 5) == [('far', 100 + 64 ** 2 + 5, 'b')]
+    assert len(wheel) == 0
+
+
+def test_tracker_sends_overdue_alerts_within_grace():
+    tracker = RespawnTracker({'Venatus': (600, 0)}, now=1000, leads=(10, 0), grace=10)
+    # The "10 minutes before" alert came due 5 minutes ago, the respawn one is ahead
+    assert tracker.record(1, 'Venatus', 1000 - 595)
+    alerts, _ = tracker.advance(1001)
+    assert alerts == [(1, 'Venatus', 10, 405)]
+    # The window opened 5 minutes ago: the "10 minutes before" alert is 15
+    # minutes overdue and dropped, the respawn one is still sent
+    assert tracker.record(2, 'Venatus', 1001 - 605)
+    alerts, _ = tracker.advance(1002)
+    assert alerts == [(2, 'Venatus', 0, 396)]
+
+
+def test_tracker_forget_guild():
+    tracker = RespawnTracker({'Venatus': (600, 0), 'Ego': (1260, 0)}, now=0)
+    tracker.record(1, 'Venatus', 0)
+    tracker.record(1, 'Ego', 0)
+    tracker.record(2, 'Ego', 0)
+    assert sorted(tracker.forget_guild(1)) == ['Ego', 'Venatus']
+    assert len(tracker) == 1
+    alerts, expired = tracker.advance(2000)
+    assert {guild_id for guild_id, *_ in alerts + expired} == {2}
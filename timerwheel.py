@@ -0,0 +1,73 @@
+class TimerWheel:
+    """Hierarchical timer wheel over integer ticks.
+
+    Level ``n`` has ``2**bits`` slots, each ``2**(bits*n)`` ticks wide, so with
+    the defaults (6 bits, 4 levels) and one-minute ticks it covers about 32
+    years. A timer goes into the coarsest level its delay needs; when a level
+    turns over, its next slot is cascaded into the finer levels. ``schedule``
+    and ``cancel`` are O(1); ``advance`` costs O(1) per tick plus the timers
+    that fire or cascade.
+
+    Timers are identified by a hashable key; scheduling an existing key moves
+    that timer.
+    """
+
+    def __init__(self, now, bits=6, levels=4):
+        self.now = now
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.wheels = [[{} for _ in range(1 << bits)] for _ in range(levels)]
+        # Key -> (level, slot) of every pending timer
+        self.where = {}
+
+    def __len__(self):
+        return len(self.where)
+
+    def __contains__(self, key):
+        return key in self.where
+
+    def schedule(self, key, expires, value=None):
+        self.cancel(key)
+        # The current tick has been processed; timers already due fire on the next one
+        self._place(key, expires, value, max(expires, self.now + 1))
+
+    def cancel(self, key):
+        position = self.where.pop(key, None)
+        if position is None:
+            return False
+        level, slot = position
+        del self.wheels[level][slot][key]
+        return True
+
+    def _place(self, key, expires, value, at):
+        delay = at - self.now
+        level = 0
+        while level < len(self.wheels) - 1 and delay >= 1 << (self.bits * (level + 1)):
+            level += 1
+        slot = (at >> (self.bits * level)) & self.mask
+        self.wheels[level][slot][key] = (expires, value)
+        self.where[key] = (level, slot)
+
+    def advance(self, to):
+        """Move the wheel to tick ``to``; returns ``(key, expires, value)`` of the timers that fired."""
+        fired = []
+        while self.now < to:
+            self.now += 1
+            # Coarsest level first, so timers it hands down are cascaded again this tick
+            top = 0
+            while top < len(self.wheels) - 1 and not self.now & ((1 << (self.bits * (top + 1))) - 1):
+                top += 1
+            for level in range(top, 0, -1):
+                slot = (self.now >> (self.bits * level)) & self.mask
+                timers = self.wheels[level][slot]
+                self.wheels[level][slot] = {}
+                for key, (expires, value) in timers.items():
+                    self._place(key, expires, value, max(expires, self.now))
+            slot = self.now & self.mask
+            timers = self.wheels[0][slot]
+            if timers:
+                self.wheels[0][slot] = {}
+                for key, (expires, value) in timers.items():
+                    del self.where[key]
+                    fired.append((key, expires, value))
+        return fired